@@ -0,0 +1,111 @@
+"""
+Batched update processing
+Handles a list of updates (a getUpdates page or a batched webhook call)
+with one deduplicated, concurrent metadata fetch phase
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from . import config, metrics
+from .deadline import Deadline
+from .pipeline import fetch_all_metadata, fetch_deadline, prepare_update, render_reply
+from .telegram import send_message
+
+
+async def send_replies(replies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Send replies, concurrently across chats but in order within each chat
+
+    Each reply gets its own UPDATE_SEND_RESERVE budget, started when its
+    turn comes: one budget shared by the whole batch would run out for
+    the later replies of a chat queued behind the per-chat rate limit.
+
+    Args:
+        replies: Reply dicts with 'chat_id' and 'text', in update order
+
+    Returns:
+        Replies that could not be sent, in input order
+    """
+    by_chat: Dict[Any, List[Dict[str, Any]]] = {}
+    for reply in replies:
+        by_chat.setdefault(reply["chat_id"], []).append(reply)
+
+    failed: List[int] = []
+    positions = {id(reply): index for index, reply in enumerate(replies)}
+
+    async def send_chat(chat_replies: List[Dict[str, Any]]) -> None:
+        for reply in chat_replies:
+            try:
+                data = await send_message(
+                    reply["chat_id"],
+                    reply["text"],
+                    deadline=Deadline(config.UPDATE_SEND_RESERVE)
+                )
+                ok = data.get("ok")
+            except Exception as e:
+                print(f"Error sending batched reply: {e}")
+                ok = False
+            if not ok:
+                failed.append(positions[id(reply)])
+
+    await asyncio.gather(*(send_chat(chat_replies) for chat_replies in by_chat.values()))
+
+    if failed:
+        metrics.count("batch_reply_dropped", len(failed))
+        chats = sorted({replies[index]["chat_id"] for index in failed}, key=str)
+        print(f"Batch: {len(failed)} of {len(replies)} replies not sent (chats {chats})")
+    return [replies[index] for index in sorted(failed)]
+
+
+async def process_batch(
+    updates: List[Dict[str, Any]],
+    send: bool = True,
+    deadline: Optional[Deadline] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Process a list of updates in bulk
+
+    1. Parse every update and extract its URLs
+    2. Fetch metadata for all distinct URLs concurrently
+    3. Tag and format every reply
+    4. Send all replies (per-chat order preserved)
+
+    Args:
+        updates: Telegram update objects, in update_id order
+        send: Send the replies (False just returns them)
+        deadline: Budget for the metadata fetch phase (sends are budgeted
+            per reply, see send_replies)
+
+    Returns:
+        Reply (or None) for each update, in input order
+    """
+    plans = []
+    for update in updates:
+        try:
+            plans.append(prepare_update(update))
+        except Exception as e:
+            metrics.count("update_error")
+            print(f"Error preparing batched update: {e}")
+            plans.append(None)
+
+    urls = [url for plan in plans if plan for url in plan.get("urls", ())]
+    metadata = {}
+    if urls:
+        metadata = await fetch_all_metadata(urls, config.BATCH_FETCH_CONCURRENCY, fetch_deadline(deadline))
+
+    replies: List[Optional[Dict[str, Any]]] = []
+    for plan in plans:
+        reply = None
+        if plan:
+            try:
+                reply = render_reply(plan, metadata.get(plan.get("url")), link_metadata=metadata)
+            except Exception as e:
+                metrics.count("update_error")
+                print(f"Error rendering batched update: {e}")
+        replies.append(reply)
+
+    if send:
+        await send_replies([reply for reply in replies if reply])
+
+    metrics.count("update_replied", sum(1 for reply in replies if reply))
+    return replies
@@ -8,14 +8,117 @@ import os
 # Telegram Bot Configuration
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 
+# Telegram Bot API base URL (override to point at a local Bot API server or stub)
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+
 # Timezone Configuration
 TIMEZONE = os.environ.get("TIMEZONE", "Asia/Kolkata")
 
 # Metadata Fetch Configuration
 METADATA_TIMEOUT = int(os.environ.get("METADATA_TIMEOUT", "5"))
 
+# Whole-update budget in seconds (keep it under the platform's function time
+# limit); fetching stops UPDATE_SEND_RESERVE seconds early so the reply can
+# still be sent. In a batch, each reply gets UPDATE_SEND_RESERVE of its own.
+UPDATE_DEADLINE = float(os.environ.get("UPDATE_DEADLINE", "9"))
+UPDATE_SEND_RESERVE = float(os.environ.get("UPDATE_SEND_RESERVE", "2"))
+
+# Per-host fetch guard: concurrent fetches per host, and a circuit breaker
+# that skips a host for HOST_COOLDOWN seconds after HOST_FAILURE_THRESHOLD
+# consecutive timeouts/connection errors/5xx responses
+HOST_MAX_CONCURRENCY = int(os.environ.get("HOST_MAX_CONCURRENCY", "4"))
+HOST_FAILURE_THRESHOLD = int(os.environ.get("HOST_FAILURE_THRESHOLD", "5"))
+HOST_COOLDOWN = float(os.environ.get("HOST_COOLDOWN", "60"))
+
+# DNS cache for page fetches (seconds / entries). Resolved addresses are
+# checked against private and reserved ranges unless ALLOW_PRIVATE_ADDRESSES
+# is set (local testing only)
+DNS_CACHE_TTL = float(os.environ.get("DNS_CACHE_TTL", "300"))
+DNS_CACHE_SIZE = int(os.environ.get("DNS_CACHE_SIZE", "1024"))
+ALLOW_PRIVATE_ADDRESSES = os.environ.get("ALLOW_PRIVATE_ADDRESSES", "false").lower() == "true"
+
+# oEmbed providers (https://oembed.com/providers.json format); unset uses the
+# bundled list (YouTube, Vimeo, Spotify, SoundCloud, TikTok, Twitter/X, Reddit)
+OEMBED_PROVIDERS_FILE = os.environ.get("OEMBED_PROVIDERS_FILE", "")
+
+# Stop downloading a page after this many bytes if </head> has not been seen
+METADATA_MAX_BYTES = int(os.environ.get("METADATA_MAX_BYTES", "524288"))
+
+# Metadata cache (TTLs in seconds; set METADATA_CACHE_DB to a file path
+# such as /tmp/metadata_cache.sqlite3 to enable the on-disk tier)
+METADATA_CACHE_SIZE = int(os.environ.get("METADATA_CACHE_SIZE", "1024"))
+METADATA_CACHE_TTL = float(os.environ.get("METADATA_CACHE_TTL", "21600"))
+METADATA_CACHE_NEGATIVE_TTL = float(os.environ.get("METADATA_CACHE_NEGATIVE_TTL", "300"))
+METADATA_CACHE_DB = os.environ.get("METADATA_CACHE_DB", "")
+
+# Webhook reply mode: "api" sends replies with a separate sendMessage call,
+# "inline" returns the sendMessage call in the webhook response body
+WEBHOOK_REPLY_MODE = os.environ.get("WEBHOOK_REPLY_MODE", "api").lower()
+
+# Update processing mode: "sync" processes the update before answering the
+# webhook, "background" acknowledges immediately and processes it on an
+# in-process per-chat scheduler (needs a long-running server such as
+# uvicorn/Docker; replies are always sent with sendMessage in this mode)
+PROCESSING_MODE = os.environ.get("PROCESSING_MODE", "sync").lower()
+QUEUE_MAX_SIZE = int(os.environ.get("QUEUE_MAX_SIZE", "1000"))
+# Chats processed concurrently (each chat's updates always run one at a time)
+QUEUE_WORKERS = int(os.environ.get("QUEUE_WORKERS", "8"))
+# Seconds the webhook waits for a free queue slot before processing inline
+QUEUE_SUBMIT_TIMEOUT = float(os.environ.get("QUEUE_SUBMIT_TIMEOUT", "1"))
+# Seconds to finish queued updates on shutdown
+QUEUE_DRAIN_TIMEOUT = float(os.environ.get("QUEUE_DRAIN_TIMEOUT", "10"))
+
+# Messages with several links: links summarised per reply (1 = first link
+# only), concurrent fetches, and the shared deadline (seconds) for all of them
+MULTI_URL_MAX = int(os.environ.get("MULTI_URL_MAX", "5"))
+MULTI_URL_CONCURRENCY = int(os.environ.get("MULTI_URL_CONCURRENCY", "5"))
+MULTI_URL_DEADLINE = float(os.environ.get("MULTI_URL_DEADLINE", "6"))
+
+# Max concurrent metadata fetches when processing a batch of updates
+BATCH_FETCH_CONCURRENCY = int(os.environ.get("BATCH_FETCH_CONCURRENCY", "10"))
+
+# Outbound Telegram rate limits (messages/second and back-to-back burst);
+# 429 responses are retried after Telegram's retry_after
+TELEGRAM_GLOBAL_RATE = float(os.environ.get("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_GLOBAL_BURST = float(os.environ.get("TELEGRAM_GLOBAL_BURST", "30"))
+TELEGRAM_CHAT_RATE = float(os.environ.get("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_CHAT_BURST = float(os.environ.get("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_MAX_RETRIES = int(os.environ.get("TELEGRAM_MAX_RETRIES", "3"))
+# Give up instead of waiting when retry_after is longer than this (seconds)
+TELEGRAM_MAX_RETRY_AFTER = float(os.environ.get("TELEGRAM_MAX_RETRY_AFTER", "60"))
+
+# Long-polling worker (python -m api.poller); each getUpdates page is one
+# batch (BATCH_FETCH_CONCURRENCY fetches), POLL_CONCURRENCY pages at once.
+# Unfinished pages stay unconfirmed and count against getUpdates' limit of
+# 100, so POLL_MAX_PENDING only matters below that
+POLL_TIMEOUT = int(os.environ.get("POLL_TIMEOUT", "30"))
+POLL_CONCURRENCY = int(os.environ.get("POLL_CONCURRENCY", "4"))
+POLL_MAX_PENDING = int(os.environ.get("POLL_MAX_PENDING", "1000"))
+
+# Webhook body decoder: "auto" (msgspec, then orjson, then json - whichever
+# is installed first), or force "msgspec", "orjson" or "json"
+JSON_DECODER = os.environ.get("JSON_DECODER", "auto").lower()
+
+# Drop redelivered updates: number of recent update_ids remembered (0 disables);
+# set DEDUP_DB to a SQLite file path to share the window between workers
+DEDUP_WINDOW = int(os.environ.get("DEDUP_WINDOW", "10000"))
+DEDUP_DB = os.environ.get("DEDUP_DB", "")
+
+# Shared HTTP connection pool configuration
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "true").lower() == "true"
+
+# Expose per-stage latency metrics on /metrics
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "false").lower() == "true"
+
 # Tag Generation Configuration
 MAX_TAGS = int(os.environ.get("MAX_TAGS", "8"))
+# Optional file with extra domain -> tag rules (JSON object or 'domain tag1,tag2' lines)
+DOMAIN_TAGS_FILE = os.environ.get("DOMAIN_TAGS_FILE", "")
+# Optional IDF vocabulary built with scripts/build_idf.py
+TAG_IDF_PATH = os.environ.get("TAG_IDF_PATH", "")
 
 # Validate required configuration
 def validate_config():
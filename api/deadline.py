@@ -0,0 +1,63 @@
+"""
+Per-update time budget
+Created when an update arrives and passed down the pipeline so each stage
+(metadata fetch, oEmbed, sendMessage) only uses the time that is left
+"""
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Absolute point in time an update must be finished by
+
+    Args:
+        seconds: Budget from now
+    """
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left (never negative)"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout for one operation: what is left, but no more than cap
+
+        Args:
+            cap: The operation's own timeout
+
+        Returns:
+            Seconds (at least 1 ms, so it is usable as an httpx timeout)
+        """
+        remaining = self.remaining
+        if cap is not None:
+            remaining = min(remaining, cap)
+        return max(remaining, 0.001)
+
+    def reserve(self, seconds: float) -> 'Deadline':
+        """Earlier deadline leaving `seconds` for later stages (e.g. sending the reply)"""
+        child = Deadline.__new__(Deadline)
+        child.expires_at = self.expires_at - seconds
+        return child
+
+    def capped(self, seconds: float) -> 'Deadline':
+        """This deadline, or `seconds` from now if that comes first"""
+        child = Deadline(seconds)
+        child.expires_at = min(child.expires_at, self.expires_at)
+        return child
+
+
+def time_budget(deadline: Optional[Deadline], cap: float) -> float:
+    """Timeout for an operation that may or may not run under a deadline"""
+    return cap if deadline is None else deadline.timeout(cap)
@@ -0,0 +1,118 @@
+"""
+Duplicate update suppression
+Remembers recent update_ids so Telegram redeliveries are dropped in O(1)
+"""
+
+import asyncio
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Optional, Set
+
+
+class UpdateDeduplicator:
+    """
+    Sliding window of recently seen update_ids
+
+    The in-memory ring buffer covers a single process. Set db_path to a
+    SQLite file shared by all workers on the host to dedupe across them;
+    its queries run on one background thread so waiting for another
+    worker's write lock never blocks the event loop.
+
+    Args:
+        window: Number of recent update_ids to remember (0 disables)
+        db_path: Optional SQLite file for a shared window
+    """
+
+    # Prune the SQLite table every this many inserts
+    PRUNE_EVERY = 500
+
+    def __init__(self, window: int, db_path: Optional[str] = None):
+        self.window = window
+        self.db_path = db_path
+        self._order: Deque[int] = deque()
+        self._seen: Set[int] = set()
+        self._db: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {'checked': 0, 'duplicates': 0}
+
+    async def is_duplicate(self, update_id: Optional[int]) -> bool:
+        """
+        Check an update_id and remember it
+
+        Args:
+            update_id: Telegram update_id (None is never a duplicate)
+
+        Returns:
+            True if the update was already seen inside the window
+        """
+        if self.window <= 0 or update_id is None:
+            return False
+
+        self.stats['checked'] += 1
+
+        if update_id in self._seen:
+            self.stats['duplicates'] += 1
+            return True
+
+        self._seen.add(update_id)
+        self._order.append(update_id)
+        if len(self._order) > self.window:
+            self._seen.discard(self._order.popleft())
+
+        if self.db_path:
+            if self._executor is None:
+                # One thread: the shared connection is never used concurrently
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dedup')
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(self._executor, self._shared_is_duplicate, update_id):
+                self.stats['duplicates'] += 1
+                return True
+
+        return False
+
+    def _shared_is_duplicate(self, update_id: int) -> bool:
+        """Record the update_id in SQLite; True if another worker got it first"""
+        db = self._connect()
+        if db is None:
+            return False
+
+        try:
+            with db:
+                inserted = db.execute(
+                    "INSERT OR IGNORE INTO seen_updates (update_id, seen_at) VALUES (?, ?)",
+                    (update_id, time.time())
+                ).rowcount
+                self._inserts += 1
+                if self._inserts % self.PRUNE_EVERY == 0:
+                    db.execute(
+                        "DELETE FROM seen_updates WHERE update_id <= "
+                        "(SELECT MAX(update_id) FROM seen_updates) - ?",
+                        (self.window,)
+                    )
+        except sqlite3.Error:
+            # Never drop an update because the shared store is unavailable
+            return False
+
+        return inserted == 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the shared SQLite window on first use (None if disabled or unavailable)"""
+        if not self.db_path:
+            return None
+        if self._db is None:
+            try:
+                db = sqlite3.connect(self.db_path, timeout=1.0, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS seen_updates ("
+                    "update_id INTEGER PRIMARY KEY, seen_at REAL NOT NULL)"
+                )
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                self.db_path = None
+                return None
+        return self._db
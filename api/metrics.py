@@ -0,0 +1,188 @@
+"""
+Hot-path latency instrumentation
+Per-stage histograms and counters exposed in Prometheus text format
+
+All helpers are no-ops unless METRICS_ENABLED is set, so instrumented code
+pays only a function call and an attribute check when metrics are off.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from . import config
+
+
+# Upper bounds in seconds (+Inf is implicit)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_NOOP = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a single label"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        # label value -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[str, List[Any]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter with a single label"""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_value, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class _Timer:
+    """Context manager that records its duration into the stage histogram"""
+
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        STAGE_SECONDS.observe(self.stage, time.perf_counter() - self.started)
+
+
+STAGE_SECONDS = Histogram(
+    'bot_stage_duration_seconds',
+    'Time spent in each update-processing stage',
+    'stage'
+)
+EVENTS = Counter('bot_events_total', 'Update-processing events', 'event')
+
+# Extra exporters: callables returning {metric_name: value} read at scrape time
+_collectors: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+
+def timed(stage: str):
+    """
+    Time a block of code
+
+    Usage:
+        with metrics.timed('tags'):
+            ...
+    """
+    if not config.METRICS_ENABLED:
+        return _NOOP
+    return _Timer(stage)
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record a duration measured elsewhere"""
+    if config.METRICS_ENABLED:
+        STAGE_SECONDS.observe(stage, seconds)
+
+
+def count(event: str, amount: float = 1) -> None:
+    """Increment an event counter"""
+    if config.METRICS_ENABLED:
+        EVENTS.inc(event, amount)
+
+
+def register_collector(
+    help_text: str,
+    collector: Callable[[], Dict[str, float]],
+    metric_type: str = 'counter'
+) -> None:
+    """
+    Export values owned by another module (e.g. cache stats)
+
+    Args:
+        help_text: HELP line used for every metric the collector returns
+        collector: Callable returning {metric_name: value}
+        metric_type: Prometheus type ('counter' or 'gauge')
+    """
+    _collectors.append((help_text, metric_type, collector))
+
+
+def fetch_tracer() -> Optional[Callable]:
+    """
+    httpx 'trace' extension hook that splits a fetch into connect/TLS/TTFB
+
+    Connect time includes the DNS lookup on a DNS cache miss (also
+    recorded on its own as the 'dns' stage).
+
+    Returns:
+        Async trace callback, or None when metrics are disabled
+    """
+    if not config.METRICS_ENABLED:
+        return None
+
+    started: Dict[str, float] = {}
+    phases = {
+        'connection.connect_tcp': 'fetch_connect',
+        'connection.start_tls': 'fetch_tls',
+    }
+
+    async def trace(event_name: str, info: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        name, _, state = event_name.rpartition('.')
+
+        if name in phases:
+            if state == 'started':
+                started[name] = now
+            elif state == 'complete' and name in started:
+                STAGE_SECONDS.observe(phases[name], now - started.pop(name))
+        elif name.endswith('send_request_headers') and state == 'started':
+            started['ttfb'] = now
+        elif name.endswith('receive_response_headers') and state == 'complete' and 'ttfb' in started:
+            STAGE_SECONDS.observe('fetch_ttfb', now - started.pop('ttfb'))
+
+    return trace
+
+
+def render() -> str:
+    """Prometheus text exposition of all metrics"""
+    lines = STAGE_SECONDS.render() + EVENTS.render()
+    for help_text, metric_type, collector in _collectors:
+        for name, value in sorted(collector().items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
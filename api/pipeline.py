@@ -0,0 +1,399 @@
+"""
+Update-processing pipeline
+Turns a Telegram update into a formatted reply
+
+Processing is split into phases so callers can batch the slow one:
+prepare_update (parse, no I/O) -> fetch_metadata (network) -> render_reply
+
+A message with several links gets one compact multi-entry reply; their
+metadata is fetched concurrently under one shared deadline.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+from . import config, metrics
+from .deadline import Deadline
+from .telegram import send_message
+from .utils import (
+    extract_message_urls,
+    fetch_metadata,
+    generate_tags,
+    merge_tags,
+    format_response,
+    format_links_response,
+    get_current_ist_time
+)
+
+
+# Message keys that carry an attachment, in detection order
+MEDIA_TYPES = ('photo', 'video', 'audio', 'voice', 'document', 'animation', 'sticker')
+
+
+def get_media_type(message: Dict[str, Any]) -> str:
+    """
+    Detect media type from message
+    
+    Args:
+        message: Telegram message object
+        
+    Returns:
+        Media type string or empty string
+    """
+    for media_type in MEDIA_TYPES:
+        if media_type in message:
+            return media_type
+    return ''
+
+
+def format_media_only_message(media_type: str, timestamp: datetime) -> str:
+    """Format message for media without caption"""
+    emoji_map = {
+        'photo': '🖼️', 'video': '🎥', 'audio': '🎵', 'voice': '🎤',
+        'document': '📄', 'animation': '🎬', 'sticker': '✨'
+    }
+    
+    emoji = emoji_map.get(media_type.lower(), '📎')
+    date = timestamp.strftime("%d %b %Y")
+    time = timestamp.strftime("%I:%M %p IST")
+    
+    return (
+        f"{emoji} <b>{media_type.capitalize()} Received</b>\n\n"
+        f"ℹ️ No caption or text provided.\n\n"
+        f"📅 <b>Date:</b> {date}\n"
+        f"⏰ <b>Time:</b> {time}"
+    )
+
+
+START_MESSAGE = """
+👋 <b>Welcome to Content Formatter Bot!</b>
+
+I'm a stateless bot that instantly formats any content you send me.
+
+<b>What I do:</b>
+✅ Extract metadata from URLs
+✅ Generate automatic tags
+✅ Format content beautifully
+✅ Add IST timestamps
+
+<b>What I support:</b>
+📝 Text messages
+🔗 URLs and links
+🖼️ Photos with captions
+🎥 Videos with captions
+🎵 Audio with captions
+📄 Documents with captions
+
+<b>Privacy:</b>
+🔒 No data storage
+🔒 No user tracking
+🔒 Instant processing and forgetting
+
+Just send me anything, and I'll format it instantly!
+"""
+
+HELP_MESSAGE = """
+ℹ️ <b>How to use Content Formatter Bot</b>
+
+<b>Simply send me:</b>
+• Any text message
+• URLs (I'll fetch metadata)
+• Photos/Videos/Audio with captions
+• Documents with descriptions
+
+<b>I will reply with:</b>
+📝 Extracted title
+📄 Description
+🔗 Original link
+🏷️ Auto-generated tags
+📅 Date and time (IST)
+
+<b>Examples:</b>
+1. Send a YouTube link → I'll extract video title and description
+2. Send an article URL → I'll fetch the article metadata
+3. Send a photo with caption → I'll format it with tags
+4. Send plain text → I'll structure it nicely
+
+<b>Note:</b> I don't store anything. Every message is processed and forgotten immediately.
+
+Questions? Just send me content and see the magic! ✨
+"""
+
+
+def prepare_update(update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Parse an update into a processing plan (no network I/O)
+    
+    Args:
+        update: Telegram update object
+        
+    Returns:
+        Plan dict, or None if there is nothing to reply to. Commands get a
+        plan with a ready 'reply'; other plans carry 'urls' (distinct, at
+        most MULTI_URL_MAX) and 'url' (the first one, or None) for the
+        metadata fetch.
+    """
+    # Extract message (handle both new messages and edited messages)
+    message = update.get("message") or update.get("edited_message")
+    
+    if not message:
+        return None
+    
+    # Get chat ID and user info
+    chat_id = message["chat"]["id"]
+    
+    # Handle commands
+    text = message.get("text", "")
+    
+    if text.startswith("/start"):
+        return {"chat_id": chat_id, "reply": START_MESSAGE}
+    
+    if text.startswith("/help"):
+        return {"chat_id": chat_id, "reply": HELP_MESSAGE}
+    
+    # Extract text content (from message or caption)
+    text_content = message.get("text") or message.get("caption") or ''
+    
+    # Detect media type
+    media_type = get_media_type(message)
+    
+    # If no text and no media, skip
+    if not text_content and not media_type:
+        return None
+    
+    # Extract URLs from the message entities (regex scan if there are none)
+    with metrics.timed("url_extract"):
+        urls = list(dict.fromkeys(extract_message_urls(message)))[:max(config.MULTI_URL_MAX, 1)]
+    
+    return {
+        "chat_id": chat_id,
+        "text_content": text_content,
+        "media_type": media_type,
+        "urls": urls,
+        "url": urls[0] if urls else None,
+        "timestamp": get_current_ist_time(),
+    }
+
+
+def render_reply(
+    plan: Dict[str, Any],
+    metadata: Optional[Dict[str, str]] = None,
+    link_metadata: Optional[Dict[str, Optional[Dict[str, str]]]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the reply for a prepared plan
+    
+    Args:
+        plan: Plan from prepare_update
+        metadata: Fetched metadata for plan['url'] (None if not fetched or failed)
+        link_metadata: URL -> metadata for every link of a multi-link plan
+        
+    Returns:
+        Reply dict with 'chat_id' and 'text', or None if nothing to send
+    """
+    chat_id = plan["chat_id"]
+    
+    if "reply" in plan:
+        return {"chat_id": chat_id, "text": plan["reply"]}
+    
+    if len(plan.get("urls", ())) > 1:
+        return {"chat_id": chat_id, "text": _render_links(plan, link_metadata or {})}
+    
+    text_content = plan["text_content"]
+    media_type = plan["media_type"]
+    url = plan["url"]
+    timestamp = plan["timestamp"]
+    
+    # Initialize metadata
+    title = 'Untitled Content'
+    description = 'No description available'
+    
+    if metadata:
+        title = metadata.get('title', title)
+        description = metadata.get('description', description)
+    
+    # If no URL and no meaningful text, handle media-only case
+    if not url and not text_content.strip():
+        if media_type:
+            return {"chat_id": chat_id, "text": format_media_only_message(media_type, timestamp)}
+        return None
+    
+    # Use text as title if no URL metadata
+    if not url and text_content.strip():
+        # Use first 100 chars as title
+        title = text_content[:100].strip()
+        if len(text_content) > 100:
+            title += '...'
+        # Use full text as description
+        description = text_content.strip()
+    
+    # Generate tags
+    with metrics.timed("tags"):
+        tags = generate_tags(
+            title=title,
+            description=description,
+            caption=text_content,
+            media_type=media_type,
+            url=url
+        )
+    
+    # Format response
+    with metrics.timed("format"):
+        response = format_response(
+            title=title,
+            description=description,
+            url=url,
+            tags=tags,
+            timestamp=timestamp
+        )
+    
+    return {"chat_id": chat_id, "text": response}
+
+
+def _render_links(plan: Dict[str, Any], link_metadata: Dict[str, Optional[Dict[str, str]]]) -> str:
+    """Format the multi-entry reply, with tags merged across all links"""
+    entries = []
+    tag_lists = []
+    
+    with metrics.timed("tags"):
+        for url in plan["urls"]:
+            metadata = link_metadata.get(url) or {}
+            title = metadata.get('title')
+            description = metadata.get('description', '')
+            
+            # Failed or timed-out links still get a readable entry
+            if not title or title == 'Untitled Content':
+                title = urlparse(url).hostname or url
+            if description == 'No description available':
+                description = ''
+            
+            entries.append({'title': title, 'description': description, 'url': url})
+            tag_lists.append(generate_tags(title=title, description=description, url=url))
+        
+        if plan["text_content"]:
+            tag_lists.append(generate_tags(caption=plan["text_content"], media_type=plan["media_type"]))
+        tags = merge_tags(tag_lists, config.MAX_TAGS)
+    
+    with metrics.timed("format"):
+        return format_links_response(entries, tags, plan["timestamp"])
+
+
+async def fetch_all_metadata(
+    urls: List[str],
+    concurrency: int,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Optional[Dict[str, str]]]:
+    """
+    Fetch metadata for distinct URLs concurrently
+    
+    Args:
+        urls: URLs to fetch (duplicates are fetched once)
+        concurrency: Max fetches in flight
+        deadline: Shared deadline for all fetches; URLs still pending
+            then map to None
+        
+    Returns:
+        Dictionary of URL -> metadata (None if the fetch failed)
+    """
+    distinct = list(dict.fromkeys(urls))
+    if not distinct:
+        return {}
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    
+    async def fetch(url: str) -> Optional[Dict[str, str]]:
+        async with semaphore:
+            try:
+                with metrics.timed("metadata_fetch"):
+                    return await fetch_metadata(url, deadline)
+            except Exception:
+                return None
+    
+    tasks = [asyncio.ensure_future(fetch(url)) for url in distinct]
+    timeout = deadline.remaining if deadline is not None else None
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        metrics.count("fetch_deadline_exceeded", len(pending))
+    
+    metrics.count("batch_urls_deduplicated", len(urls) - len(distinct))
+    return {
+        url: task.result() if task in done else None
+        for url, task in zip(distinct, tasks)
+    }
+
+
+async def fetch_plan_metadata(
+    plan: Dict[str, Any],
+    deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, str]]:
+    """Fetch metadata for a plan's URL (None if there is no URL or the fetch fails)"""
+    if not plan.get("url"):
+        return None
+    try:
+        with metrics.timed("metadata_fetch"):
+            return await fetch_metadata(plan["url"], deadline)
+    except Exception:
+        # Continue with fallback values
+        return None
+
+
+def fetch_deadline(deadline: Optional[Deadline]) -> Optional[Deadline]:
+    """Part of an update's budget available for fetching (the rest is kept for sending)"""
+    if deadline is None:
+        return None
+    return deadline.reserve(config.UPDATE_SEND_RESERVE)
+
+
+async def handle_update(
+    update: Dict[str, Any],
+    deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build the reply for a Telegram update
+    
+    Args:
+        update: Telegram update object
+        deadline: Update budget; fetching stops UPDATE_SEND_RESERVE
+            seconds before it so the reply can still be sent
+        
+    Returns:
+        Reply dict with 'chat_id' and 'text', or None if nothing to send
+    """
+    plan = prepare_update(update)
+    if not plan:
+        return None
+    
+    budget = fetch_deadline(deadline)
+    
+    if len(plan.get("urls", ())) > 1:
+        if budget is None:
+            links_deadline = Deadline(config.MULTI_URL_DEADLINE)
+        else:
+            links_deadline = budget.capped(config.MULTI_URL_DEADLINE)
+        link_metadata = await fetch_all_metadata(
+            plan["urls"],
+            config.MULTI_URL_CONCURRENCY,
+            links_deadline
+        )
+        return render_reply(plan, link_metadata=link_metadata)
+    
+    metadata = await fetch_plan_metadata(plan, budget)
+    return render_reply(plan, metadata)
+
+
+async def process_update(update: Dict[str, Any]) -> None:
+    """
+    Build and send the reply for an update (background worker entry point)
+    
+    The update was already acknowledged, so its UPDATE_DEADLINE budget
+    starts when a worker picks it up.
+    """
+    deadline = Deadline(config.UPDATE_DEADLINE)
+    reply = await handle_update(update, deadline)
+    if reply:
+        await send_message(reply["chat_id"], reply["text"], deadline=deadline)
+        metrics.count("update_replied")
+    else:
+        metrics.count("update_ignored")
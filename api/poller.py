@@ -0,0 +1,270 @@
+"""
+Long-polling worker
+Standalone alternative to the webhook for a single long-running process
+
+Usage:
+    python -m api.poller
+
+The next getUpdates call is already in flight while the previous page is
+being processed. Each page goes through the batch pipeline (one
+deduplicated, concurrent metadata fetch for the whole page, then bulk
+sends), and several pages may be processed at once. Replies stay in order
+within each chat, across pages too: a chat's place in the send order is
+taken when its page arrives.
+
+Delivery is at-least-once. The offset passed to getUpdates only confirms
+pages whose replies have been sent, so updates cut short by a crash or a
+drain timeout are redelivered on the next start (and may be answered
+twice). Until then Telegram keeps returning the unconfirmed updates, which
+the poller skips; they count against getUpdates' 100-update limit, so at
+most about 100 updates are in progress at once.
+"""
+
+import asyncio
+import signal
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+from . import config, metrics
+from .batch import process_batch
+from .deadline import Deadline
+from .scheduler import chat_key
+from .telegram import delete_webhook, get_updates, send_message
+from .utils.http_client import open_clients, close_clients
+
+
+# (previous page's turn for the chat or None, this page's turn)
+Turn = Tuple[Optional[asyncio.Future], asyncio.Future]
+
+
+class Poller:
+    """
+    getUpdates loop feeding each page to the batch pipeline
+
+    Per-chat order is kept with turn futures rather than ChatScheduler: the
+    scheduler hands one update at a time to a handler, while a page here is
+    fetched as one batch (one shared, deduplicated metadata fetch) and only
+    its sends have to wait for earlier pages of the same chat.
+
+    Args:
+        concurrency: Max getUpdates pages processed at once
+        max_pending: Stop polling while this many updates are unfinished
+        poll_timeout: Long-poll timeout in seconds
+    """
+
+    def __init__(self, concurrency: int, max_pending: int, poll_timeout: int):
+        self.concurrency = max(concurrency, 1)
+        self.max_pending = max(max_pending, 1)
+        self.poll_timeout = poll_timeout
+        # Offset confirmed to Telegram: first update of the oldest unfinished page
+        self.offset: Optional[int] = None
+        # First update_id not received yet
+        self._next_id: Optional[int] = None
+        # First update_id of each unfinished page, oldest first
+        self._page_starts: Dict[int, None] = {}
+        self.pending = 0
+        self.active_pages = 0
+        self._pages: Set[asyncio.Task] = set()
+        self._room = asyncio.Condition()
+        # Chat -> turn of the latest page with an update from it
+        self._tails: Dict[Hashable, asyncio.Future] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        """Poll until stop() is called, then finish pages in progress"""
+        backoff = 1.0
+        poll: Optional[asyncio.Task] = None
+        stop_wait = asyncio.ensure_future(self._stopping.wait())
+
+        try:
+            while not self._stopping.is_set():
+                if poll is None:
+                    poll = asyncio.create_task(get_updates(self.offset, self.poll_timeout))
+
+                await asyncio.wait({poll, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+                if self._stopping.is_set():
+                    break
+
+                try:
+                    received = poll.result()
+                    backoff = 1.0
+                except Exception as e:
+                    print(f"Polling error: {e} (retrying in {backoff:.0f}s)")
+                    poll = None
+                    # Wake up early on stop()
+                    await asyncio.wait({stop_wait}, timeout=backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    continue
+
+                # Unconfirmed updates come back until their page is done
+                updates = [
+                    update for update in received
+                    if self._next_id is None or update["update_id"] >= self._next_id
+                ]
+                if received and not updates:
+                    # Nothing new, only pages in progress: poll again once
+                    # one of them has finished and moved the offset
+                    poll = None
+                    if self._pages:
+                        await asyncio.wait({*self._pages, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                if updates:
+                    self._next_id = updates[-1]["update_id"] + 1
+                    self._page_starts[updates[0]["update_id"]] = None
+
+                # Pipeline: start the next long poll before processing this page
+                poll = asyncio.create_task(get_updates(self.offset, self.poll_timeout))
+
+                if updates:
+                    # Blocks while too much is in progress, which pauses polling
+                    await self._admit(len(updates))
+                    task = asyncio.create_task(self._process_page(updates, self._take_turns(updates)))
+                    self._pages.add(task)
+                    task.add_done_callback(self._pages.discard)
+        finally:
+            stop_wait.cancel()
+            if poll is not None:
+                poll.cancel()
+            await self._drain(config.QUEUE_DRAIN_TIMEOUT)
+            await self._confirm_offset()
+
+    async def _admit(self, size: int) -> None:
+        """Wait for room for a page of `size` updates"""
+        async with self._room:
+            await self._room.wait_for(
+                lambda: not self.active_pages
+                or (self.active_pages < self.concurrency and self.pending + size <= self.max_pending)
+            )
+            self.active_pages += 1
+            self.pending += size
+
+    def _take_turns(self, updates: List[Dict[str, Any]]) -> Dict[Hashable, Turn]:
+        """Queue this page behind earlier pages for each of its chats"""
+        loop = asyncio.get_running_loop()
+        turns: Dict[Hashable, Turn] = {}
+        for update in updates:
+            key = chat_key(update)
+            if key not in turns:
+                turn = loop.create_future()
+                turns[key] = (self._tails.get(key), turn)
+                self._tails[key] = turn
+        return turns
+
+    async def _process_page(self, updates: List[Dict[str, Any]], turns: Dict[Hashable, Turn]) -> None:
+        # UPDATE_DEADLINE bounds the metadata fetches only. Sends are not
+        # bounded: a big page from one chat can take longer than the budget
+        # under the per-chat rate limit, and the page is only confirmed once
+        # its replies are out.
+        deadline = Deadline(config.UPDATE_DEADLINE)
+        try:
+            try:
+                replies = await process_batch(updates, send=False, deadline=deadline)
+            except Exception as e:
+                metrics.count("update_error")
+                print(f"Error processing update page: {e}")
+                replies = []
+
+            by_chat: Dict[Hashable, List[Dict[str, Any]]] = {key: [] for key in turns}
+            for reply in replies:
+                if reply:
+                    by_chat.setdefault(reply["chat_id"], []).append(reply)
+
+            await asyncio.gather(*(
+                self._send_turn(key, turns.get(key), chat_replies)
+                for key, chat_replies in by_chat.items()
+            ))
+
+            # Replies are out: the page may be confirmed (not when cancelled)
+            del self._page_starts[updates[0]["update_id"]]
+            self.offset = next(iter(self._page_starts), self._next_id)
+        finally:
+            # Cancelled mid-page: don't leave later pages waiting on this one
+            for key, (_, turn) in turns.items():
+                self._end_turn(key, turn)
+            async with self._room:
+                self.active_pages -= 1
+                self.pending -= len(updates)
+                self._room.notify_all()
+
+    async def _send_turn(
+        self,
+        key: Hashable,
+        turn: Optional[Turn],
+        replies: List[Dict[str, Any]]
+    ) -> None:
+        """Send a chat's replies once earlier pages are done with that chat"""
+        previous, current = turn or (None, None)
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            for reply in replies:
+                try:
+                    await send_message(reply["chat_id"], reply["text"])
+                except Exception as e:
+                    metrics.count("update_error")
+                    print(f"Error sending polled reply: {e}")
+        finally:
+            if current is not None:
+                self._end_turn(key, current)
+
+    def _end_turn(self, key: Hashable, turn: asyncio.Future) -> None:
+        if not turn.done():
+            turn.set_result(None)
+        if self._tails.get(key) is turn:
+            del self._tails[key]
+
+    async def _confirm_offset(self) -> None:
+        """Confirm the finished pages to Telegram before exiting"""
+        if self.offset is None:
+            return
+        try:
+            await get_updates(self.offset, 0, limit=1)
+        except Exception as e:
+            print(f"Could not confirm update offset {self.offset}: {e}")
+
+    async def _drain(self, timeout: float) -> None:
+        """Finish pages in progress, cancelling them after `timeout` seconds"""
+        if not self._pages:
+            return
+        _, pending = await asyncio.wait(set(self._pages), timeout=timeout)
+        if pending:
+            print(f"Poller drain timed out with {self.pending} updates unfinished")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def main() -> None:
+    config.validate_config()
+    await open_clients()
+
+    poller = Poller(
+        concurrency=config.POLL_CONCURRENCY,
+        max_pending=config.POLL_MAX_PENDING,
+        poll_timeout=config.POLL_TIMEOUT
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, poller.stop)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+
+    try:
+        await delete_webhook()
+        print("🤖 Polling for updates...")
+        await poller.run()
+    finally:
+        await close_clients()
+        print("👋 Poller stopped")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,202 @@
+"""
+Outbound rate limiting for the Telegram Bot API
+Token buckets that keep sends under Telegram's flood limits
+
+Buckets hand out reservations: a caller takes a token even when none is
+left and sleeps until its token would have been refilled. Concurrent callers
+therefore queue up in arrival order without a lock or a polling loop.
+Callers with a time limit are turned away before they reserve, and a
+reservation whose wait is cancelled is handed back, so sends that never
+happen do not push later ones further out.
+"""
+
+import asyncio
+import time
+from typing import Dict, Hashable, Optional
+from . import metrics
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket
+
+    Args:
+        rate: Tokens refilled per second (0 disables the limit)
+        burst: Bucket capacity
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token would be available, without taking it"""
+        if self.rate <= 0:
+            return max(self.blocked_until - now, 0.0)
+
+        self._refill(now)
+        delay = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    def reserve(self, now: float) -> float:
+        """
+        Take one token
+
+        Returns:
+            Seconds to wait before using it
+        """
+        if self.rate <= 0:
+            return max(self.blocked_until - now, 0.0)
+
+        self._refill(now)
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+
+    def refund(self, now: float) -> None:
+        """Give back a reserved token that was not used"""
+        if self.rate <= 0:
+            return
+        self._refill(now)
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Hand out no tokens for the next `seconds` (e.g. Telegram's retry_after)"""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def idle(self, now: float) -> bool:
+        """True when the bucket is full again and can be forgotten"""
+        if self.rate > 0:
+            self._refill(now)
+        return self.tokens >= self.burst and self.blocked_until <= now
+
+
+class TelegramRateLimiter:
+    """
+    Global bucket plus one bucket per chat
+
+    Args:
+        global_rate: Messages per second across all chats
+        global_burst: Messages allowed back to back across all chats
+        chat_rate: Messages per second to one chat
+        chat_burst: Messages allowed back to back to one chat
+        max_chats: Idle per-chat buckets are pruned beyond this many
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        global_burst: float,
+        chat_rate: float,
+        chat_burst: float,
+        max_chats: int = 10000
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_chats = max_chats
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: Dict[Hashable, TokenBucket] = {}
+        self.waiting = 0
+        self.stats = {'acquired': 0, 'throttled': 0, 'paused': 0, 'rejected': 0}
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.max_chats:
+                self._prune(time.monotonic())
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        for chat_id in [key for key, bucket in self._chats.items() if bucket.idle(now)]:
+            del self._chats[chat_id]
+
+    async def _wait(self, delay: float, *reserved: TokenBucket) -> None:
+        """Sleep on a reservation, refunding `reserved` if cancelled"""
+        self.waiting += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            now = time.monotonic()
+            for bucket in reserved:
+                bucket.refund(now)
+            raise
+        finally:
+            self.waiting -= 1
+
+    async def acquire(
+        self,
+        chat_id: Optional[Hashable] = None,
+        max_wait: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Wait until a message may be sent
+
+        The chat bucket is settled before the global one so a slow chat does
+        not hold global tokens it cannot use yet.
+
+        Args:
+            chat_id: Target chat (None for calls not aimed at a chat)
+            max_wait: Give up instead of waiting longer than this; no token
+                is kept when giving up
+
+        Returns:
+            Seconds spent waiting, or None if it would exceed max_wait
+        """
+        started = time.monotonic()
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+
+        if max_wait is not None and (
+            (chat_bucket is not None and chat_bucket.wait_time(started) > max_wait)
+            or self._global.wait_time(started) > max_wait
+        ):
+            self.stats['rejected'] += 1
+            return None
+
+        reserved = []
+        if chat_bucket is not None:
+            delay = chat_bucket.reserve(started)
+            reserved.append(chat_bucket)
+            if delay > 0:
+                await self._wait(delay, *reserved)
+
+        now = time.monotonic()
+        if max_wait is not None and now - started + self._global.wait_time(now) > max_wait:
+            for bucket in reserved:
+                bucket.refund(now)
+            self.stats['rejected'] += 1
+            return None
+
+        delay = self._global.reserve(now)
+        reserved.append(self._global)
+        if delay > 0:
+            await self._wait(delay, *reserved)
+
+        waited = time.monotonic() - started
+        self.stats['acquired'] += 1
+        if waited > 0.001:
+            self.stats['throttled'] += 1
+        metrics.observe('telegram_throttle', waited)
+        return waited
+
+    def pause(self, seconds: float, chat_id: Optional[Hashable] = None) -> None:
+        """
+        Back off after a 429
+
+        Args:
+            seconds: Telegram's retry_after
+            chat_id: Chat the limit applies to (None pauses every send)
+        """
+        now = time.monotonic()
+        bucket = self._global if chat_id is None else self._chat_bucket(chat_id)
+        bucket.pause(now, seconds)
+        self.stats['paused'] += 1
@@ -0,0 +1,175 @@
+"""
+Per-chat update scheduler for background processing
+Runs different chats concurrently while keeping each chat's replies in order
+
+Each chat has its own FIFO. A chat with pending updates sits at most once in
+a shared ready ring, and a worker takes ONE update from it before putting
+the chat back at the end of the ring. A chat therefore never has two updates
+in flight, and a chat flooding links gets one turn per round instead of
+holding every worker.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+from . import metrics
+
+
+def chat_key(update: Dict[str, Any]) -> Hashable:
+    """
+    Ordering key for an update: its chat_id
+
+    Updates without a chat (e.g. inline queries) get a key of their own and
+    are not ordered against anything.
+    """
+    message = (
+        update.get("message")
+        or update.get("edited_message")
+        or update.get("channel_post")
+        or update.get("edited_channel_post")
+    )
+    if message and "chat" in message:
+        return message["chat"].get("id")
+    return ("update", update.get("update_id"), id(update))
+
+
+class ChatScheduler:
+    """
+    Bounded per-chat FIFO scheduler drained by a fixed pool of workers
+
+    Args:
+        handler: Coroutine function processing one update
+        max_size: Max updates waiting across all chats (backpressure when full)
+        workers: Max updates processed concurrently (one per chat at a time)
+        key: Function mapping an update to its ordering key
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        max_size: int,
+        workers: int,
+        key: Callable[[Dict[str, Any]], Hashable] = chat_key
+    ):
+        self.handler = handler
+        self.max_size = max_size
+        self.workers = workers
+        self.key = key
+        self._chats: Dict[Hashable, Deque[Dict[str, Any]]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._depth = 0
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = False
+        self.stats = {'submitted': 0, 'rejected': 0, 'processed': 0, 'failed': 0}
+
+    @property
+    def depth(self) -> int:
+        """Number of updates waiting for a worker"""
+        return self._depth
+
+    @property
+    def active_chats(self) -> int:
+        """Number of chats with an update waiting or in flight"""
+        return len(self._chats)
+
+    def start(self) -> None:
+        """Start the worker tasks (idempotent); called from the app lifespan"""
+        if self._accepting:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._accepting = True
+
+    async def submit(self, update: Dict[str, Any], timeout: Optional[float] = 0.0) -> bool:
+        """
+        Queue an update behind earlier updates from the same chat
+
+        Args:
+            update: Telegram update object
+            timeout: Seconds to wait for a free slot when the scheduler is
+                full (0 = don't wait, None = wait as long as it takes)
+
+        Returns:
+            True if queued, False if it stayed full or is not running (not
+            started yet, or draining); the caller should process the update
+            itself
+        """
+        if not self._accepting:
+            return False
+
+        try:
+            if timeout is None:
+                await self._slots.acquire()
+            elif timeout > 0:
+                await asyncio.wait_for(self._slots.acquire(), timeout)
+            elif self._slots.locked():
+                raise asyncio.TimeoutError
+            else:
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self.stats['rejected'] += 1
+            metrics.count('queue_rejected')
+            return False
+
+        # Drain began while this update waited for a slot
+        if not self._accepting:
+            self._slots.release()
+            return False
+
+        key = self.key(update)
+        pending = self._chats.get(key)
+        if pending is None:
+            self._chats[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            # Chat is already queued or in flight; its worker re-queues it
+            pending.append(update)
+
+        self._depth += 1
+        self.stats['submitted'] += 1
+        return True
+
+    async def drain(self, timeout: float) -> None:
+        """
+        Stop accepting work, finish queued updates, then stop the workers
+
+        Args:
+            timeout: Max seconds to wait for queued work before cancelling
+        """
+        if not self._accepting:
+            return
+        self._accepting = False
+
+        try:
+            await asyncio.wait_for(self._ready.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Scheduler drain timed out with {self.depth} updates pending")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            pending = self._chats[key]
+            update = pending.popleft()
+            self._depth -= 1
+            self._slots.release()
+            try:
+                await self.handler(update)
+                self.stats['processed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                metrics.count('update_error')
+                print(f"Error processing queued update: {e}")
+            finally:
+                # Back of the ring if more is waiting, so other chats go first
+                if pending:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                self._ready.task_done()
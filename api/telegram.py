@@ -0,0 +1,185 @@
+"""
+Telegram Bot API client
+Thin wrappers over the shared Telegram connection pool
+
+Every call goes through call_api, which applies the outbound rate limits
+and retries when Telegram answers 429 Too Many Requests.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+from . import config, metrics
+from .deadline import Deadline
+from .rate_limiter import TelegramRateLimiter
+from .utils.http_client import TELEGRAM_POOL, get_client
+
+
+# Telegram API endpoint
+TELEGRAM_API_URL = f"{config.TELEGRAM_API_BASE}/bot{config.BOT_TOKEN}"
+
+rate_limiter = TelegramRateLimiter(
+    global_rate=config.TELEGRAM_GLOBAL_RATE,
+    global_burst=config.TELEGRAM_GLOBAL_BURST,
+    chat_rate=config.TELEGRAM_CHAT_RATE,
+    chat_burst=config.TELEGRAM_CHAT_BURST
+)
+metrics.register_collector(
+    'Telegram calls waiting on the outbound rate limiter',
+    lambda: {"bot_telegram_throttle_waiting": rate_limiter.waiting},
+    metric_type='gauge'
+)
+metrics.register_collector(
+    'Telegram rate limiter totals',
+    lambda: {
+        "bot_telegram_calls_total": rate_limiter.stats['acquired'],
+        "bot_telegram_throttled_total": rate_limiter.stats['throttled'],
+        "bot_telegram_retry_after_total": rate_limiter.stats['paused'],
+        "bot_telegram_throttle_rejected_total": rate_limiter.stats['rejected'],
+    }
+)
+
+
+async def call_api(
+    method: str,
+    payload: Optional[Dict[str, Any]] = None,
+    chat_id: Optional[int] = None,
+    timeout: Optional[float] = None,
+    throttle: bool = True,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Call a Bot API method with rate limiting and 429 retries
+    
+    Args:
+        method: Bot API method name (e.g. 'sendMessage')
+        payload: JSON parameters
+        chat_id: Target chat, for the per-chat limit
+        timeout: Request timeout in seconds (pool default if None)
+        throttle: Apply the outbound rate limits (off for getUpdates)
+        deadline: Update budget; throttling, retries and the request
+            itself stop when it runs out
+        
+    Returns:
+        Decoded API response ({"ok": false, ...} if retries or the
+        deadline ran out, or the response was not JSON)
+    """
+    client = get_client(TELEGRAM_POOL)
+    
+    for attempt in range(config.TELEGRAM_MAX_RETRIES + 1):
+        try:
+            if throttle:
+                max_wait = None if deadline is None else deadline.remaining
+                if await rate_limiter.acquire(chat_id, max_wait) is None:
+                    raise asyncio.TimeoutError
+            if deadline is not None and deadline.expired:
+                raise asyncio.TimeoutError
+        except asyncio.TimeoutError:
+            metrics.count("telegram_deadline_exceeded")
+            return {"ok": False, "description": f"{method} skipped: update deadline exceeded"}
+        
+        extra = {}
+        if deadline is not None:
+            extra["timeout"] = deadline.timeout(timeout or client.timeout.read)
+        elif timeout is not None:
+            extra["timeout"] = timeout
+        
+        response = await client.post(f"{TELEGRAM_API_URL}/{method}", json=payload, **extra)
+        try:
+            data = response.json()
+        except ValueError:
+            # Gateway/proxy error page or an empty body instead of Bot API JSON
+            metrics.count("telegram_invalid_response")
+            data = {
+                "ok": False,
+                "error_code": response.status_code,
+                "description": f"{method} returned a non-JSON HTTP {response.status_code} response"
+            }
+        
+        if response.status_code != 429 and data.get("error_code") != 429:
+            return data
+        
+        # Flood control: Telegram says how long to back off. Only the
+        # throttled chat's sends are held back; a call not aimed at a chat
+        # (getUpdates, deleteWebhook) just waits itself and leaves the
+        # global send bucket alone.
+        retry_after = float(data.get("parameters", {}).get("retry_after", 1))
+        metrics.count("telegram_rate_limited")
+        paced = throttle and chat_id is not None
+        if paced:
+            rate_limiter.pause(retry_after, chat_id)
+        
+        if attempt == config.TELEGRAM_MAX_RETRIES or retry_after > config.TELEGRAM_MAX_RETRY_AFTER:
+            break
+        if deadline is not None and retry_after >= deadline.remaining:
+            break
+        if not paced:
+            await asyncio.sleep(retry_after)
+    
+    print(f"Telegram {method} rate limited, giving up (retry_after={retry_after:g}s)")
+    return data
+
+
+async def send_message(
+    chat_id: int,
+    text: str,
+    parse_mode: str = "HTML",
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """
+    Send message to Telegram chat
+    
+    Args:
+        chat_id: Telegram chat ID
+        text: Message text
+        parse_mode: Parse mode (HTML or Markdown)
+        deadline: Update budget (None = pool timeout only)
+        
+    Returns:
+        API response
+    """
+    with metrics.timed("telegram_send"):
+        data = await call_api(
+            "sendMessage",
+            {
+                "chat_id": chat_id,
+                "text": text,
+                "parse_mode": parse_mode
+            },
+            chat_id=chat_id,
+            deadline=deadline
+        )
+    
+    if not data.get("ok"):
+        metrics.count("telegram_send_failed")
+        print(f"sendMessage to {chat_id} failed: {data.get('description')}")
+    return data
+
+
+async def get_updates(offset: Optional[int], timeout: int, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Long-poll for updates
+    
+    Args:
+        offset: First update_id to return (confirms all earlier updates)
+        timeout: Long-poll timeout in seconds
+        limit: Max updates per call
+        
+    Returns:
+        List of updates (empty on timeout)
+        
+    Raises:
+        RuntimeError: If Telegram returns an error
+    """
+    payload: Dict[str, Any] = {"timeout": timeout, "limit": limit}
+    if offset is not None:
+        payload["offset"] = offset
+    
+    data = await call_api("getUpdates", payload, timeout=timeout + 10, throttle=False)
+    if not data.get("ok"):
+        raise RuntimeError(f"getUpdates failed: {data.get('description')}")
+    return data.get("result", [])
+
+
+async def delete_webhook() -> Dict[str, Any]:
+    """Remove the webhook so getUpdates can be used"""
+    return await call_api("deleteWebhook")
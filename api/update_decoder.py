@@ -0,0 +1,174 @@
+"""
+Fast decoding of Telegram update payloads
+Uses the fastest JSON library available: msgspec, then orjson, then the
+standard library. msgspec and orjson are optional extras (commented out in
+requirements.txt); without them the standard json module is used.
+
+msgspec decodes straight into compact updates with the usual Telegram
+shape, trimmed to:
+    update_id
+    message / edited_message:
+        chat.id, text, caption
+        entities, caption_entities: only 'url' and 'text_link' entities,
+            with type, offset, length and url
+        one key per attachment type present (photo, video, ...), value True
+orjson and json return the full update: the pipeline reads either shape,
+and trimming in Python after a full parse costs more than it saves.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Union
+from . import config
+from .pipeline import MEDIA_TYPES
+from .utils.url_extractor import URL_ENTITY_TYPES
+
+
+Decoded = Union[Dict[str, Any], List[Any]]
+
+MESSAGE_KEYS = ('message', 'edited_message')
+
+ENTITY_KEYS = ('entities', 'caption_entities')
+
+
+def _stdlib_decoder() -> Callable[[bytes], Decoded]:
+    return json.loads
+
+
+def _orjson_decoder() -> Optional[Callable[[bytes], Decoded]]:
+    """orjson parses everything, but in C"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.loads
+
+
+def _msgspec_decoder() -> Optional[Callable[[bytes], Decoded]]:
+    """
+    msgspec decodes straight into typed structs and skips unknown fields
+    without building them; attachments are kept as unparsed raw JSON
+    """
+    try:
+        import msgspec
+    except ImportError:
+        return None
+
+    class Chat(msgspec.Struct):
+        id: int
+
+    class Entity(msgspec.Struct):
+        type: str
+        offset: int = 0
+        length: int = 0
+        url: Optional[str] = None
+
+    class Message(msgspec.Struct):
+        chat: Chat
+        text: Optional[str] = None
+        caption: Optional[str] = None
+        entities: Optional[List[Entity]] = None
+        caption_entities: Optional[List[Entity]] = None
+        photo: Optional[msgspec.Raw] = None
+        video: Optional[msgspec.Raw] = None
+        audio: Optional[msgspec.Raw] = None
+        voice: Optional[msgspec.Raw] = None
+        document: Optional[msgspec.Raw] = None
+        animation: Optional[msgspec.Raw] = None
+        sticker: Optional[msgspec.Raw] = None
+
+    class Update(msgspec.Struct):
+        update_id: Optional[int] = None
+        message: Optional[Message] = None
+        edited_message: Optional[Message] = None
+
+    decoder = msgspec.json.Decoder(Union[Update, List[Update]])
+    fallback = _orjson_decoder() or _stdlib_decoder()
+
+    def to_entities(entities: List[Entity]) -> List[Dict[str, Any]]:
+        compact = []
+        for entity in entities:
+            if entity.type in URL_ENTITY_TYPES:
+                link = {'type': entity.type, 'offset': entity.offset, 'length': entity.length}
+                if entity.url is not None:
+                    link['url'] = entity.url
+                compact.append(link)
+        return compact
+
+    def to_message(message: Message) -> Dict[str, Any]:
+        compact: Dict[str, Any] = {'chat': {'id': message.chat.id}}
+        if message.text is not None:
+            compact['text'] = message.text
+        if message.caption is not None:
+            compact['caption'] = message.caption
+        for key in ENTITY_KEYS:
+            entities = getattr(message, key)
+            if entities is not None:
+                compact[key] = to_entities(entities)
+        for key in MEDIA_TYPES:
+            if getattr(message, key) is not None:
+                compact[key] = True
+        return compact
+
+    def to_update(update: Update) -> Dict[str, Any]:
+        compact: Dict[str, Any] = {}
+        if update.update_id is not None:
+            compact['update_id'] = update.update_id
+        for key in MESSAGE_KEYS:
+            message = getattr(update, key)
+            if message is not None:
+                compact[key] = to_message(message)
+        return compact
+
+    def decode(body: bytes) -> Decoded:
+        try:
+            payload = decoder.decode(body)
+        except msgspec.ValidationError:
+            # Valid JSON of an unexpected shape: take the generic path
+            return fallback(body)
+        except msgspec.DecodeError as e:
+            # Same contract as json/orjson: invalid JSON is a ValueError
+            raise ValueError(f"Invalid JSON: {e}") from e
+        if isinstance(payload, list):
+            return [to_update(update) for update in payload]
+        return to_update(payload)
+    return decode
+
+
+def _select_decoder(name: str) -> Callable[[bytes], Decoded]:
+    """
+    Pick the decoder named by JSON_DECODER ('auto' = fastest available)
+
+    A named library that is not installed falls back to the next one.
+    """
+    chain = {
+        'auto': (_msgspec_decoder, _orjson_decoder),
+        'msgspec': (_msgspec_decoder, _orjson_decoder),
+        'orjson': (_orjson_decoder,),
+        'json': (),
+    }.get(name, (_msgspec_decoder, _orjson_decoder))
+
+    for factory in chain:
+        decoder = factory()
+        if decoder is not None:
+            return decoder
+    return _stdlib_decoder()
+
+
+_decoder = _select_decoder(config.JSON_DECODER)
+
+
+def decode_update(body: bytes) -> Decoded:
+    """
+    Decode a webhook body into update(s)
+
+    Args:
+        body: Raw request body
+
+    Returns:
+        Update dict (compact with msgspec, full otherwise), or a list of
+        them for batched bodies
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    return _decoder(body)
@@ -2,11 +2,12 @@
 Utilities package for Telegram Content Formatter Bot
 """
 
-from .url_extractor import extract_urls, get_first_valid_url, is_valid_url
+from .url_extractor import extract_urls, extract_message_urls, get_first_valid_url, is_valid_url
 from .metadata_fetcher import fetch_metadata
-from .tag_generator import generate_tags
+from .tag_generator import generate_tags, merge_tags
 from .formatter import (
     format_response,
+    format_links_response,
     format_error_message,
     format_media_only_message,
     get_current_ist_time
@@ -14,11 +15,14 @@ from .formatter import (
 
 __all__ = [
     'extract_urls',
+    'extract_message_urls',
     'get_first_valid_url',
     'is_valid_url',
     'fetch_metadata',
     'generate_tags',
+    'merge_tags',
     'format_response',
+    'format_links_response',
     'format_error_message',
     'format_media_only_message',
     'get_current_ist_time',
@@ -0,0 +1,178 @@
+"""
+Cached DNS resolution with address checks for outbound page fetches
+Hostnames are resolved once, the resulting IPs are checked against private
+and reserved ranges, and connections are pinned to the checked address so a
+second lookup (DNS rebinding) cannot swap in an internal one
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import httpcore
+from .. import config, metrics
+from .single_flight import SingleFlight
+
+
+class BlockedAddressError(httpcore.ConnectError):
+    """Hostname resolved only to private/reserved addresses"""
+
+
+def is_public_address(address: str) -> bool:
+    """
+    Check that an IP is globally routable unicast
+
+    Rejects loopback, private, link-local, carrier-grade NAT, reserved,
+    unspecified and multicast ranges (IPv4-mapped IPv6 is unwrapped first).
+
+    Args:
+        address: IPv4 or IPv6 address string
+
+    Returns:
+        True if the address may be fetched
+    """
+    try:
+        ip = ipaddress.ip_address(address.split('%', 1)[0])
+    except ValueError:
+        return False
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class DnsCache:
+    """
+    Async resolver with an LRU + TTL cache
+
+    Lookups go through the system resolver (getaddrinfo in the loop's thread
+    pool), which does not expose record TTLs, so entries live for a fixed
+    `ttl`. Concurrent lookups of one hostname share a single query.
+
+    Args:
+        ttl: Seconds a resolved hostname is reused
+        max_entries: LRU capacity
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, ...]]]" = OrderedDict()
+        self._lookups = SingleFlight()
+        self.stats = {'hits': 0, 'misses': 0, 'blocked': 0}
+
+    async def resolve(self, host: str) -> List[str]:
+        """
+        Resolve a hostname to IP addresses
+
+        Args:
+            host: Hostname or IP literal
+
+        Returns:
+            Addresses in resolver order
+
+        Raises:
+            socket.gaierror: If the name does not resolve
+        """
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+            return [host.strip('[]')]
+        except ValueError:
+            pass
+
+        key = host.lower().rstrip('.')
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, addresses = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return list(addresses)
+            del self._entries[key]
+
+        self.stats['misses'] += 1
+        addresses = await self._lookups.do(key, lambda: self._lookup(key))
+        return list(addresses)
+
+    async def _lookup(self, host: str) -> Tuple[str, ...]:
+        loop = asyncio.get_running_loop()
+        with metrics.timed('dns'):
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        addresses = tuple(dict.fromkeys(info[4][0] for info in infos))
+
+        if self.ttl > 0:
+            self._entries[host] = (time.monotonic() + self.ttl, addresses)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return addresses
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class PinnedNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that connects to pre-checked IPs
+
+    httpcore still sends the original hostname for SNI and certificate
+    checks; only the TCP connect target is replaced.
+
+    Args:
+        resolver: DnsCache used for lookups
+        backend: Backend doing the actual I/O (AnyIO by default)
+    """
+
+    def __init__(self, resolver: DnsCache, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self.resolver = resolver
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await asyncio.wait_for(self.resolver.resolve(host), timeout)
+        except asyncio.TimeoutError:
+            raise httpcore.ConnectTimeout(f"DNS lookup for {host} timed out")
+        except OSError as e:
+            raise httpcore.ConnectError(f"DNS lookup for {host} failed: {e}")
+
+        if not config.ALLOW_PRIVATE_ADDRESSES:
+            addresses = [address for address in addresses if is_public_address(address)]
+            if not addresses:
+                self.resolver.stats['blocked'] += 1
+                metrics.count('fetch_blocked_address')
+                raise BlockedAddressError(f"{host} does not resolve to a public address")
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        raise last_error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        raise httpcore.ConnectError("Unix sockets are not allowed for page fetches")
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+dns_cache = DnsCache(ttl=config.DNS_CACHE_TTL, max_entries=config.DNS_CACHE_SIZE)
+
+metrics.register_collector(
+    'DNS cache counter',
+    lambda: {f"bot_dns_cache_{name}_total": value for name, value in dns_cache.stats.items()}
+)
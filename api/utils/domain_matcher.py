@@ -0,0 +1,110 @@
+"""
+Domain -> tag lookup
+Reversed-label suffix trie: 'm.youtube.com' walks com -> youtube -> m and
+returns the tags of the longest registered suffix, in O(labels) time
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class DomainTrie:
+    """
+    Suffix trie keyed by domain labels, most significant label first
+
+    A rule for 'youtube.com' matches 'youtube.com' and any subdomain
+    ('www.youtube.com', 'm.youtube.com') but not 'notyoutube.com'.
+    """
+
+    def __init__(self):
+        # Each node: {'children': {label: node}, 'tags': [...] or None}
+        self._root: Dict = {'children': {}, 'tags': None}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, domain: str, tags: List[str]) -> None:
+        """
+        Register a rule (later rules for the same domain replace earlier ones)
+
+        Args:
+            domain: Domain suffix such as 'github.com' or 'news.ycombinator.com'
+            tags: Tags for that domain and its subdomains
+        """
+        labels = _labels(domain)
+        if not labels:
+            return
+
+        node = self._root
+        for label in labels:
+            node = node['children'].setdefault(label, {'children': {}, 'tags': None})
+        if node['tags'] is None:
+            self._size += 1
+        node['tags'] = list(tags)
+
+    def lookup(self, host: str) -> List[str]:
+        """
+        Tags for the longest registered suffix of host
+
+        Args:
+            host: Hostname (port and leading 'www.' are fine)
+
+        Returns:
+            List of tags, empty if no rule matches
+        """
+        node = self._root
+        found: Optional[List[str]] = None
+        for label in _labels(host):
+            node = node['children'].get(label)
+            if node is None:
+                break
+            if node['tags'] is not None:
+                found = node['tags']
+        return found or []
+
+    def update(self, rules: Iterable[Tuple[str, List[str]]]) -> None:
+        for domain, tags in rules:
+            self.add(domain, tags)
+
+
+def _labels(host: str) -> List[str]:
+    """'WWW.Example.com:443.' -> ['com', 'example', 'www']"""
+    host = host.strip().lower().split(':', 1)[0].rstrip('.')
+    return [label for label in reversed(host.split('.')) if label]
+
+
+def load_domain_rules(path: str) -> List[Tuple[str, List[str]]]:
+    """
+    Load domain -> tag rules from a file
+
+    Supported formats:
+    - JSON object: {"github.com": ["Code", "GitHub"], ...}
+    - Text: one rule per line, 'domain tag1,tag2' ('#' starts a comment)
+
+    Args:
+        path: Rules file
+
+    Returns:
+        List of (domain, tags) pairs
+    """
+    with open(path, encoding='utf-8') as f:
+        content = f.read()
+
+    if content.lstrip().startswith('{'):
+        data = json.loads(content)
+        return [
+            (domain, tags if isinstance(tags, list) else [tags])
+            for domain, tags in data.items()
+        ]
+
+    rules = []
+    for line in content.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        domain, _, tags = line.partition(' ')
+        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+        if tag_list:
+            rules.append((domain, tag_list))
+    return rules
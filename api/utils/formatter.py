@@ -1,10 +1,15 @@
 """
 Response formatting utilities
 Optimized for Telegram Bot API HTML format
+
+Page titles, descriptions, message text and URLs are escaped before they
+go into the markup: a stray '<' or '&' would otherwise make Telegram
+reject the whole message (or render someone else's markup).
 """
 
 from datetime import datetime
-from typing import List, Optional
+from html import escape
+from typing import Dict, List, Optional
 import pytz
 from .. import config
 
@@ -35,14 +40,14 @@ def format_response(
     time = timestamp.strftime("%I:%M %p IST")
     
     # Tags
-    tags_str = ' '.join(tags)
-    u = url if url else 'N/A'
+    tags_str = escape(' '.join(tags), quote=False)
+    u = escape(url, quote=False) if url else 'N/A'
     
     # HTML formatting
     return (
         f"📌 <b>Content Saved</b>\n\n"
-        f"📝 <b>Title:</b>\n{title}\n\n"
-        f"📄 <b>Description:</b>\n{description}\n\n"
+        f"📝 <b>Title:</b>\n{escape(title, quote=False)}\n\n"
+        f"📄 <b>Description:</b>\n{escape(description, quote=False)}\n\n"
         f"🔗 <b>Link:</b>\n{u}\n\n"
         f"🏷️ <b>Tags:</b>\n{tags_str}\n\n"
         f"📅 <b>Date:</b> {date}\n"
@@ -50,6 +55,47 @@ def format_response(
     )
 
 
+def format_links_response(
+    entries: List[Dict[str, str]],
+    tags: List[str],
+    timestamp: datetime
+) -> str:
+    """
+    Format a compact reply for a message with several links
+    
+    Args:
+        entries: One dict per link with 'title', 'description' and 'url'
+            (empty description = none available)
+        tags: Merged hashtags
+        timestamp: Timestamp in IST
+        
+    Returns:
+        Formatted HTML message
+    """
+    date = timestamp.strftime("%d %b %Y")
+    time = timestamp.strftime("%I:%M %p IST")
+    
+    items = []
+    for number, entry in enumerate(entries, 1):
+        item = f"{number}. <b>{escape(entry['title'], quote=False)}</b>\n"
+        description = entry['description']
+        if description:
+            # Shorten before escaping so an entity is never cut in half
+            if len(description) > 120:
+                description = description[:117].rstrip() + '...'
+            item += f"{escape(description, quote=False)}\n"
+        item += f"🔗 {escape(entry['url'], quote=False)}"
+        items.append(item)
+    
+    return (
+        f"📌 <b>{len(entries)} Links Saved</b>\n\n"
+        + "\n\n".join(items)
+        + f"\n\n🏷️ <b>Tags:</b>\n{escape(' '.join(tags), quote=False)}\n\n"
+        f"📅 <b>Date:</b> {date}\n"
+        f"⏰ <b>Time:</b> {time}"
+    )
+
+
 def format_error_message(error_type: str) -> str:
     """Format error message using simple Markdown"""
     error_messages = {
@@ -0,0 +1,166 @@
+"""
+Streaming HTML <head> parser
+Feeds the response body to an incremental parser and stops at </head>
+"""
+
+import codecs
+import re
+from typing import AsyncIterator, Optional
+from lxml import etree
+
+
+# Bytes searched for a <meta> charset declaration (the HTML prescan window)
+SNIFF_BYTES = 1024
+
+# Pages that declare nothing are decoded as UTF-8, like httpx's response.text
+DEFAULT_ENCODING = 'utf-8'
+
+# Matches both <meta charset="..."> and
+# <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.-]+)', re.IGNORECASE)
+
+# The -sig / plain utf-16 codecs strip the BOM while decoding
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+
+def sniff_encoding(prefix: bytes) -> str:
+    """
+    Find the charset of a page that has none in its Content-Type
+
+    Args:
+        prefix: First bytes of the body
+
+    Returns:
+        Encoding from the byte order mark or a <meta> declaration, else UTF-8
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    match = META_CHARSET.search(prefix[:SNIFF_BYTES])
+    if match:
+        try:
+            encoding = codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            return DEFAULT_ENCODING
+        # A declaration readable as ASCII cannot be UTF-16 (HTML spec rule)
+        return DEFAULT_ENCODING if encoding.startswith('utf-16') else encoding
+    return DEFAULT_ENCODING
+
+
+class HeadParser:
+    """
+    Incremental HTML parser that reports when the document head is complete
+
+    The head counts as complete on </head> or on the first <body> start
+    tag (for pages that omit </head>).
+
+    The body is decoded here (undecodable bytes become U+FFFD, as in
+    httpx's response.text) and fed to lxml as text. Without an encoding the
+    first SNIFF_BYTES are buffered and searched for a charset declaration
+    first; libxml2 would otherwise assume Latin-1.
+
+    Args:
+        encoding: Charset from the Content-Type header, if any
+    """
+
+    def __init__(self, encoding: Optional[str] = None):
+        self._parser = etree.HTMLPullParser(
+            events=('start', 'end'),
+            remove_comments=True,
+            no_network=True
+        )
+        self._decoder: Optional[codecs.IncrementalDecoder] = None
+        self._pending = b''
+        self.done = False
+        if encoding:
+            self._start(encoding)
+
+    def _start(self, encoding: str) -> None:
+        try:
+            decoder_class = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            decoder_class = codecs.getincrementaldecoder(DEFAULT_ENCODING)
+        self._decoder = decoder_class(errors='replace')
+
+    def _feed_text(self, text: str) -> None:
+        if text:
+            self._parser.feed(text)
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Feed a chunk of the body
+
+        Args:
+            chunk: Raw bytes
+
+        Returns:
+            True once the head is complete
+        """
+        if self.done:
+            return True
+
+        if self._decoder is None:
+            self._pending += chunk
+            if len(self._pending) < SNIFF_BYTES:
+                return False
+            self._start(sniff_encoding(self._pending))
+            chunk, self._pending = self._pending, b''
+
+        self._feed_text(self._decoder.decode(chunk))
+        for event, element in self._parser.read_events():
+            tag = element.tag if isinstance(element.tag, str) else ''
+            if (event == 'end' and tag == 'head') or (event == 'start' and tag == 'body'):
+                self.done = True
+                break
+        return self.done
+
+    def close(self) -> Optional[etree._Element]:
+        """Finish parsing and return the document root (None if nothing parsed)"""
+        if self._decoder is None:
+            # Short page: it never filled the sniffing window
+            self._start(sniff_encoding(self._pending))
+            self._feed_text(self._decoder.decode(self._pending))
+            self._pending = b''
+        if not self.done:
+            self._feed_text(self._decoder.decode(b'', final=True))
+        try:
+            return self._parser.close()
+        except etree.XMLSyntaxError:
+            return None
+
+
+async def read_head(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+    encoding: Optional[str] = None
+) -> Optional[etree._Element]:
+    """
+    Parse a streamed body up to the end of its <head>
+
+    Stops pulling chunks as soon as the head is complete or max_bytes
+    have been read, so the rest of the page is never downloaded.
+
+    Args:
+        chunks: Async iterator of body chunks (e.g. response.aiter_bytes())
+        max_bytes: Byte cap
+        encoding: Charset from the Content-Type header, if any
+
+    Returns:
+        Parsed document root (None if nothing could be parsed)
+    """
+    parser = HeadParser(encoding)
+    received = 0
+
+    async for chunk in chunks:
+        if received + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        if parser.feed(chunk) or received >= max_bytes:
+            break
+
+    return parser.close()
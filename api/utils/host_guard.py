@@ -0,0 +1,196 @@
+"""
+Per-host protection for outbound page fetches
+Caps concurrent fetches per host and trips a circuit breaker on hosts that
+keep timing out, so one bad origin cannot tie up every worker
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+from .. import config, metrics
+
+
+class _HostState:
+    __slots__ = ('semaphore', 'active', 'failures', 'open_until', 'probing')
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+
+class HostSlot:
+    """
+    Result of entering HostGuard.slot()
+
+    Callers check `admitted` and set `failed` when the host misbehaved
+    (timeout, connection error, 5xx), or `skip_record` when the fetch says
+    nothing about the host (e.g. our own deadline cut it short).
+    """
+
+    __slots__ = ('admitted', 'failed', 'skip_record')
+
+    def __init__(self, admitted: bool):
+        self.admitted = admitted
+        self.failed = False
+        self.skip_record = False
+
+
+class _SlotContext:
+    def __init__(self, guard: 'HostGuard', host: str, timeout: float):
+        self.guard = guard
+        self.host = host
+        self.timeout = timeout
+        self.state: Optional[_HostState] = None
+        self.slot: Optional[HostSlot] = None
+        self.probe = False
+
+    async def __aenter__(self) -> HostSlot:
+        guard = self.guard
+        state = guard._state(self.host)
+        now = time.monotonic()
+
+        # Open circuit: short-circuit until the cooldown ends, then let a
+        # single probe through (half-open)
+        if state.open_until:
+            if now < state.open_until or state.probing:
+                guard.stats['short_circuited'] += 1
+                metrics.count('host_circuit_open')
+                self.slot = HostSlot(False)
+                return self.slot
+            state.probing = self.probe = True
+
+        try:
+            await asyncio.wait_for(state.semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            # Waiting longer would cost as much as the fetch timeout
+            if self.probe:
+                state.probing = False
+            guard.stats['saturated'] += 1
+            metrics.count('host_saturated')
+            self.slot = HostSlot(False)
+            return self.slot
+
+        state.active += 1
+        self.state = state
+        self.slot = HostSlot(True)
+        return self.slot
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        state = self.state
+        if state is None:
+            return
+        state.active -= 1
+        state.semaphore.release()
+
+        # Neither a success nor a failure: leave the failure count alone and
+        # let another request probe
+        if exc_type is asyncio.CancelledError or (exc_type is None and self.slot.skip_record):
+            if self.probe:
+                state.probing = False
+            return
+        self.guard._record(self.host, state, failed=self.slot.failed or exc_type is not None)
+
+
+class HostGuard:
+    """
+    Per-host semaphores plus a consecutive-failure circuit breaker
+
+    Args:
+        max_concurrency: Concurrent fetches allowed per host
+        failure_threshold: Consecutive failures that open the circuit
+        cooldown: Seconds an open circuit short-circuits fetches
+        max_hosts: Idle host entries are pruned beyond this many
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        failure_threshold: int,
+        cooldown: float,
+        max_hosts: int = 4096
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.failure_threshold = max(failure_threshold, 1)
+        self.cooldown = cooldown
+        self.max_hosts = max_hosts
+        self._hosts: Dict[str, _HostState] = {}
+        self.stats = {'short_circuited': 0, 'saturated': 0, 'opened': 0}
+
+    @property
+    def open_circuits(self) -> int:
+        """Hosts currently short-circuited"""
+        now = time.monotonic()
+        return sum(1 for state in self._hosts.values() if state.open_until > now)
+
+    def slot(self, host: str, timeout: float) -> _SlotContext:
+        """
+        Reserve a fetch slot for a host
+
+        Usage:
+            async with host_guard.slot(host, timeout) as slot:
+                if not slot.admitted:
+                    return fallback
+                ...
+                slot.failed = True  # on timeout / connection error / 5xx
+                slot.skip_record = True  # outcome says nothing about the host
+
+        Args:
+            host: Hostname being fetched
+            timeout: Max seconds to wait for a free slot
+
+        Returns:
+            Async context manager yielding a HostSlot
+        """
+        return _SlotContext(self, host, timeout)
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                self._prune()
+            state = self._hosts[host] = _HostState(self.max_concurrency)
+        return state
+
+    def _prune(self) -> None:
+        idle = [
+            host for host, state in self._hosts.items()
+            if not state.active and not state.failures and not state.open_until
+        ]
+        for host in idle:
+            del self._hosts[host]
+
+    def _record(self, host: str, state: _HostState, failed: bool) -> None:
+        if not failed:
+            state.failures = 0
+            state.open_until = 0.0
+            state.probing = False
+            return
+
+        state.failures += 1
+        if state.probing or state.failures >= self.failure_threshold:
+            if not state.open_until or state.probing:
+                self.stats['opened'] += 1
+                metrics.count('host_circuit_opened')
+                print(f"Circuit open for {host} after {state.failures} failures ({self.cooldown:g}s cooldown)")
+            state.open_until = time.monotonic() + self.cooldown
+            state.probing = False
+
+
+host_guard = HostGuard(
+    max_concurrency=config.HOST_MAX_CONCURRENCY,
+    failure_threshold=config.HOST_FAILURE_THRESHOLD,
+    cooldown=config.HOST_COOLDOWN,
+)
+
+metrics.register_collector(
+    'Per-host fetch guard counter',
+    lambda: {f"bot_host_guard_{name}_total": value for name, value in host_guard.stats.items()}
+)
+metrics.register_collector(
+    'Hosts whose circuit breaker is open',
+    lambda: {"bot_host_circuits_open": host_guard.open_circuits},
+    metric_type='gauge'
+)
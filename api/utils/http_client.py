@@ -0,0 +1,109 @@
+"""
+Shared HTTP connection pools
+One long-lived httpx.AsyncClient per upstream class, reused across requests
+"""
+
+from typing import Dict, Optional
+import httpx
+from .. import config
+from .dns_resolver import PinnedNetworkBackend, dns_cache
+
+
+# Pool names
+TELEGRAM_POOL = 'telegram'
+OEMBED_POOL = 'oembed'
+WEB_POOL = 'web'
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional 'h2' package"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _pinned_transport(limits: httpx.Limits, http2: bool) -> httpx.AsyncHTTPTransport:
+    """
+    Transport for user-supplied URLs: cached DNS, resolved IPs checked
+    against private ranges, connections pinned to the checked IP
+    """
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+    # httpx does not expose httpcore's network_backend option
+    transport._pool._network_backend = PinnedNetworkBackend(dns_cache)
+    return transport
+
+
+def _build_client(pool: str) -> httpx.AsyncClient:
+    """
+    Build a client for the given pool
+
+    Args:
+        pool: Pool name (telegram, oembed or web)
+
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    http2 = config.HTTP2_ENABLED and _http2_available()
+
+    if pool == TELEGRAM_POOL:
+        return httpx.AsyncClient(timeout=10.0, limits=limits, http2=http2)
+
+    if pool == OEMBED_POOL:
+        return httpx.AsyncClient(
+            timeout=config.METADATA_TIMEOUT,
+            transport=_pinned_transport(limits, http2),
+            headers={'User-Agent': config.USER_AGENT}
+        )
+
+    if pool == WEB_POOL:
+        return httpx.AsyncClient(
+            timeout=config.METADATA_TIMEOUT,
+            transport=_pinned_transport(limits, http2),
+            follow_redirects=True,
+            headers={'User-Agent': config.USER_AGENT}
+        )
+
+    raise ValueError(f"Unknown HTTP pool: {pool}")
+
+
+def get_client(pool: str) -> httpx.AsyncClient:
+    """
+    Get the shared client for a pool, creating it on first use
+
+    Clients are normally created by the app lifespan, but platforms that
+    skip lifespan events still get a warm client after the first request.
+
+    Args:
+        pool: Pool name (telegram, oembed or web)
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    client: Optional[httpx.AsyncClient] = _clients.get(pool)
+    if client is None or client.is_closed:
+        client = _build_client(pool)
+        _clients[pool] = client
+    return client
+
+
+async def open_clients() -> None:
+    """Create all pools up front (called on app startup)"""
+    for pool in (TELEGRAM_POOL, OEMBED_POOL, WEB_POOL):
+        get_client(pool)
+
+
+async def close_clients() -> None:
+    """Close all pools and release their connections (called on app shutdown)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
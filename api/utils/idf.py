@@ -0,0 +1,134 @@
+"""
+Corpus inverse document frequency (IDF) statistics for tag scoring
+Compact binary vocabulary: a float32 array of IDF values plus a term list
+"""
+
+import math
+import struct
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+MAGIC = b'IDF1'
+# magic, document count, term count, IDF for unseen terms
+HEADER = struct.Struct('<4sIIf')
+
+
+class IdfTable:
+    """
+    Read-only term -> IDF mapping
+
+    Args:
+        weights: Dictionary of lowercase term -> IDF
+        default: IDF for terms missing from the vocabulary
+        doc_count: Number of documents the table was built from
+    """
+
+    def __init__(self, weights: Dict[str, float], default: float, doc_count: int):
+        self.weights = weights
+        self.default = default
+        self.doc_count = doc_count
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def get(self, term: str) -> float:
+        return self.weights.get(term, self.default)
+
+
+def smoothed_idf(doc_count: int, df: int) -> float:
+    """Smoothed IDF: log((N + 1) / (df + 1)) + 1"""
+    return math.log((doc_count + 1) / (df + 1)) + 1.0
+
+
+def count_document_frequencies(
+    documents: Iterable[str],
+    tokenize: Callable[[str], Iterable[str]]
+) -> Tuple[int, Counter]:
+    """
+    Count in how many documents each term appears
+
+    Args:
+        documents: Document texts
+        tokenize: Callable returning the lowercase terms of a text
+
+    Returns:
+        Tuple of (document count, Counter of term -> document frequency)
+    """
+    doc_count = 0
+    df: Counter = Counter()
+    for document in documents:
+        doc_count += 1
+        df.update(set(tokenize(document)))
+    return doc_count, df
+
+
+def write_idf(
+    path: str,
+    doc_count: int,
+    df: Counter,
+    min_df: int = 2,
+    max_terms: Optional[int] = None
+) -> int:
+    """
+    Write the vocabulary file
+
+    Terms seen in fewer than min_df documents are dropped and score as
+    unseen terms (IDF of a term that appears in a single document).
+
+    Args:
+        path: Output file
+        doc_count: Number of documents
+        df: Document frequencies
+        min_df: Minimum document frequency to keep a term
+        max_terms: Keep only this many most frequent terms
+
+    Returns:
+        Number of terms written
+    """
+    kept: List[Tuple[str, int]] = [(term, n) for term, n in df.most_common(max_terms) if n >= min_df]
+    kept.sort()
+
+    terms = '\n'.join(term for term, _ in kept).encode('utf-8')
+    values = array('f', (smoothed_idf(doc_count, n) for _, n in kept))
+    default = smoothed_idf(doc_count, 1)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, doc_count, len(kept), default))
+        f.write(values.tobytes())
+        f.write(terms)
+
+    return len(kept)
+
+
+def load_idf(path: str) -> IdfTable:
+    """
+    Load a vocabulary file written by write_idf
+
+    Args:
+        path: Vocabulary file
+
+    Returns:
+        IdfTable
+
+    Raises:
+        ValueError: If the file is not a vocabulary file
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not an IDF vocabulary file")
+    magic, doc_count, term_count, default = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an IDF vocabulary file")
+
+    values_end = HEADER.size + 4 * term_count
+    values = array('f')
+    values.frombytes(data[HEADER.size:values_end])
+    terms = data[values_end:].decode('utf-8').split('\n') if term_count else []
+    if len(terms) != term_count:
+        raise ValueError(f"{path} is truncated")
+
+    return IdfTable(dict(zip(terms, values)), default, doc_count)
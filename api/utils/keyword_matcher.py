@@ -0,0 +1,124 @@
+"""
+Multi-pattern keyword matching
+Word-level Aho-Corasick automaton: finds every single- and multi-word
+pattern in a token stream in one linear scan, however many patterns exist
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over words instead of characters
+
+    Patterns are phrases of one or more words; text is fed as a sequence
+    of lowercase tokens. Build once at import, then call scan() per text.
+    When only distinct words are at hand, word_values answers single-word
+    patterns with one hash lookup, and phrase_starts tells callers whether
+    the ordered scan is needed at all.
+
+    Usage:
+        automaton = KeywordAutomaton()
+        automaton.add('machine learning', 'MachineLearning')
+        automaton.build()
+        automaton.scan(['intro', 'to', 'machine', 'learning'])  # ['MachineLearning']
+    """
+
+    def __init__(self):
+        # Node 0 is the root; each node maps word -> child node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        self._built = False
+        # Derived by build(): single-word pattern values and phrase first words
+        self.word_values: Dict[str, List[Any]] = {}
+        self.phrase_starts: Set[str] = set()
+
+    def add(self, phrase: str, value: Any) -> None:
+        """
+        Register a pattern
+
+        Args:
+            phrase: One or more whitespace-separated words (case-insensitive)
+            value: Returned by scan() whenever the phrase occurs
+        """
+        words = phrase.lower().split()
+        if not words:
+            return
+
+        node = 0
+        for word in words:
+            child = self._goto[node].get(word)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][word] = child
+            node = child
+        self._output[node].append(value)
+        self._built = False
+
+    def build(self) -> 'KeywordAutomaton':
+        """Compute failure links (breadth-first) and merge outputs"""
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+        self.word_values = {}
+        self.phrase_starts = set()
+        for word, child in self._goto[0].items():
+            if self._output[child]:
+                self.word_values[word] = self._output[child]
+            if self._goto[child]:
+                self.phrase_starts.add(word)
+
+        self._built = True
+        return self
+
+    def scan(self, tokens: Iterable[str]) -> List[Any]:
+        """
+        Find all pattern occurrences
+
+        Args:
+            tokens: Lowercase words in text order
+
+        Returns:
+            Values of every match, in order of where each match ends
+        """
+        if not self._built:
+            self.build()
+
+        goto, fail, output = self._goto, self._fail, self._output
+        root = goto[0]
+        hits: List[Any] = []
+        node = 0
+
+        for token in tokens:
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0) if node else root.get(token, 0)
+            if output[node]:
+                hits.extend(output[node])
+
+        return hits
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[str, Any]]) -> 'KeywordAutomaton':
+        """Build an automaton from (phrase, value) pairs"""
+        automaton = cls()
+        for phrase, value in items:
+            automaton.add(phrase, value)
+        return automaton.build()
@@ -0,0 +1,115 @@
+"""
+Single-pass <head> metadata extraction
+Walks the head's <meta>, <title>, <link> and JSON-LD elements once
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+from lxml import etree
+
+
+# Candidate keys in priority order
+TITLE_PRIORITY = ('og:title', 'twitter:title', 'title', '<title>', 'ld:headline', 'ld:name')
+DESCRIPTION_PRIORITY = ('og:description', 'twitter:description', 'description', 'ld:description')
+
+# Meta names/properties worth keeping
+_META_KEYS = {
+    'og:title', 'og:description', 'og:site_name', 'og:type', 'og:image',
+    'twitter:title', 'twitter:description',
+    'title', 'description', 'keywords',
+}
+
+
+def collect_head_candidates(root: Optional[etree._Element]) -> Dict[str, str]:
+    """
+    Collect all title/description candidates from a parsed document
+
+    Args:
+        root: lxml document root (as returned by HeadParser.close())
+
+    Returns:
+        Dictionary of candidate key -> stripped value. Keys are meta
+        names/properties ('og:title', 'description', ...), '<title>',
+        'link:<rel>' for <link> hrefs and 'ld:<field>' for JSON-LD fields.
+    """
+    candidates: Dict[str, str] = {}
+    if root is None:
+        return candidates
+
+    head = root.find('head')
+    if head is None:
+        head = root
+
+    ld_blocks: List[str] = []
+
+    for element in head.iter('meta', 'title', 'link', 'script'):
+        tag = element.tag
+
+        if tag == 'meta':
+            key = element.get('property') or element.get('name')
+            content = element.get('content')
+            if key and content:
+                key = key.strip().lower()
+                content = content.strip()
+                if key in _META_KEYS and content and key not in candidates:
+                    candidates[key] = content
+
+        elif tag == 'title':
+            # Match <title>.string semantics: plain text only
+            if len(element) == 0 and element.text and '<title>' not in candidates:
+                text = element.text.strip()
+                if text:
+                    candidates['<title>'] = text
+
+        elif tag == 'link':
+            rel = (element.get('rel') or '').strip().lower()
+            href = element.get('href')
+            if rel and href:
+                candidates.setdefault(f"link:{rel}", href.strip())
+
+        elif element.get('type', '').lower() == 'application/ld+json' and element.text:
+            ld_blocks.append(element.text)
+
+    # JSON-LD is only decoded when meta tags leave a gap
+    if ld_blocks and not (_first(candidates, TITLE_PRIORITY[:4]) and _first(candidates, DESCRIPTION_PRIORITY[:3])):
+        for block in ld_blocks:
+            _collect_json_ld(block, candidates)
+
+    return candidates
+
+
+def pick_title(candidates: Dict[str, str]) -> Optional[str]:
+    """Best title candidate (OG, Twitter, meta title, <title>, JSON-LD)"""
+    return _first(candidates, TITLE_PRIORITY)
+
+
+def pick_description(candidates: Dict[str, str]) -> Optional[str]:
+    """Best description candidate (OG, Twitter, meta description, JSON-LD)"""
+    return _first(candidates, DESCRIPTION_PRIORITY)
+
+
+def _first(candidates: Dict[str, str], keys) -> Optional[str]:
+    for key in keys:
+        value = candidates.get(key)
+        if value:
+            return value
+    return None
+
+
+def _collect_json_ld(block: str, candidates: Dict[str, str]) -> None:
+    """Add headline/name/description from a JSON-LD block"""
+    try:
+        data: Any = json.loads(block)
+    except ValueError:
+        return
+
+    items = data if isinstance(data, list) else [data]
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if isinstance(item.get('@graph'), list):
+            items.extend(item['@graph'])
+        for field in ('headline', 'name', 'description'):
+            value = item.get(field)
+            if isinstance(value, str) and value.strip():
+                candidates.setdefault(f"ld:{field}", value.strip())
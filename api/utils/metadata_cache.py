@@ -0,0 +1,199 @@
+"""
+URL metadata cache
+In-process LRU tier with an optional on-disk SQLite tier that survives cold starts
+"""
+
+import asyncio
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from .. import config, metrics
+
+
+class MetadataCache:
+    """
+    Two-tier TTL cache for fetched metadata, keyed by cleaned URL
+
+    Failed fetches (timeouts, HTTP errors) are cached too, with a shorter
+    TTL, so a broken link is not re-fetched on every share.
+
+    The memory tier is checked inline. SQLite queries run on one background
+    thread so disk I/O and lock waits never block the event loop; expired
+    rows are purged when the file is opened and every PURGE_EVERY writes.
+    """
+
+    # Delete expired SQLite rows every this many writes
+    PURGE_EVERY = 500
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        negative_ttl: float,
+        db_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, str], bool]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._writes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'negative_hits': 0,
+            'evictions': 0,
+        }
+
+    async def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Look up cached metadata
+
+        Args:
+            key: Cleaned URL
+
+        Returns:
+            Copy of the cached metadata, or None on miss/expiry
+        """
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, metadata, negative = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self._record_hit('memory_hits', negative)
+                return dict(metadata)
+            del self._memory[key]
+
+        if self.db_path:
+            row = await self._run(self._db_get, key)
+            if row and row[3] > now:
+                metadata = {'title': row[0], 'description': row[1]}
+                self._remember(key, row[3], metadata, bool(row[2]))
+                self._record_hit('disk_hits', bool(row[2]))
+                return dict(metadata)
+
+        self.stats['misses'] += 1
+        return None
+
+    async def set(self, key: str, metadata: Dict[str, str], negative: bool = False) -> None:
+        """
+        Store metadata
+
+        Args:
+            key: Cleaned URL
+            metadata: Dictionary with 'title' and 'description'
+            negative: True if this is fallback metadata from a failed fetch
+        """
+        ttl = self.negative_ttl if negative else self.ttl
+        if ttl <= 0:
+            return
+
+        expires_at = time.time() + ttl
+        entry = {'title': metadata.get('title', ''), 'description': metadata.get('description', '')}
+        self._remember(key, expires_at, entry, negative)
+
+        if self.db_path:
+            await self._run(self._db_set, key, entry, negative, expires_at)
+
+    async def _run(self, func, *args):
+        """Run a SQLite call on the cache's own thread"""
+        if self._executor is None:
+            # One thread: the connection is never used concurrently
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='metadata-cache')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _db_get(self, key: str) -> Optional[Tuple[str, str, int, float]]:
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            return db.execute(
+                "SELECT title, description, negative, expires_at "
+                "FROM metadata_cache WHERE url = ?",
+                (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+
+    def _db_set(self, key: str, entry: Dict[str, str], negative: bool, expires_at: float) -> None:
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO metadata_cache "
+                    "(url, title, description, negative, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, entry['title'], entry['description'], int(negative), expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_EVERY == 0:
+                    self._purge_expired(db)
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _purge_expired(db: sqlite3.Connection) -> None:
+        """Delete expired rows from the on-disk tier"""
+        db.execute("DELETE FROM metadata_cache WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, key: str, expires_at: float, metadata: Dict[str, str], negative: bool) -> None:
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (expires_at, metadata, negative)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _record_hit(self, tier: str, negative: bool) -> None:
+        self.stats['hits'] += 1
+        self.stats[tier] += 1
+        if negative:
+            self.stats['negative_hits'] += 1
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite tier on first use (None if disabled or unavailable)"""
+        if not self.db_path:
+            return None
+        if self._db is None:
+            try:
+                db = sqlite3.connect(self.db_path, timeout=1.0, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata_cache ("
+                    "url TEXT PRIMARY KEY, title TEXT, description TEXT, "
+                    "negative INTEGER NOT NULL DEFAULT 0, expires_at REAL NOT NULL)"
+                )
+                # Rows left behind by earlier processes
+                self._purge_expired(db)
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                # Unwritable filesystem etc. - run memory-only
+                self.db_path = None
+                return None
+        return self._db
+
+
+metadata_cache = MetadataCache(
+    max_entries=config.METADATA_CACHE_SIZE,
+    ttl=config.METADATA_CACHE_TTL,
+    negative_ttl=config.METADATA_CACHE_NEGATIVE_TTL,
+    db_path=config.METADATA_CACHE_DB or None,
+)
+
+metrics.register_collector(
+    'Metadata cache counter',
+    lambda: {f"bot_metadata_cache_{name}_total": value for name, value in metadata_cache.stats.items()}
+)
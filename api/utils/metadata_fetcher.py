@@ -3,13 +3,48 @@ Metadata fetching from URLs
 Extracts title and description using Open Graph tags and HTML meta tags
 """
 
+import asyncio
+import time
 import httpx
-from bs4 import BeautifulSoup
-from typing import Dict, Optional
-from .. import config
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from .. import config, metrics
+from ..deadline import Deadline, time_budget
+from .head_parser import read_head
+from .dns_resolver import BlockedAddressError
+from .host_guard import host_guard
+from .http_client import OEMBED_POOL, WEB_POOL, get_client
+from .meta_extractor import collect_head_candidates, pick_description, pick_title
+from .metadata_cache import metadata_cache
+from .oembed import OEMBED_REGISTRY, oembed_to_metadata
+from .single_flight import SingleFlight
+from .url_extractor import clean_url
 
 
-async def fetch_metadata(url: str) -> Dict[str, str]:
+# Outcomes of a network fetch
+FETCH_OK = 'ok'
+FETCH_FAILED = 'failed'            # page-level problem (4xx, not parseable)
+FETCH_UNREACHABLE = 'unreachable'  # host-level problem (timeout, connection error, 5xx)
+
+# Concurrent cache misses for the same cleaned URL share one fetch
+in_flight = SingleFlight()
+metrics.register_collector(
+    'Metadata fetch coalescing counter',
+    lambda: {
+        "bot_metadata_fetch_leaders_total": in_flight.stats['leaders'],
+        "bot_metadata_fetch_coalesced_total": in_flight.stats['coalesced'],
+    }
+)
+
+
+def _fallback_metadata() -> Dict[str, str]:
+    return {
+        'title': 'Untitled Content',
+        'description': 'No description available'
+    }
+
+
+async def fetch_metadata(url: str, deadline: Optional[Deadline] = None) -> Dict[str, str]:
     """
     Fetch metadata (title, description) from URL
     
@@ -17,146 +52,177 @@ async def fetch_metadata(url: str) -> Dict[str, str]:
     1. Open Graph tags (og:title, og:description)
     2. HTML meta tags
     3. <title> element
-    4. Fallback values
+    4. JSON-LD headline/name/description
+    5. Fallback values
+    
+    Results are cached by cleaned URL; failed fetches are cached
+    with a shorter TTL. Concurrent calls for the same cleaned URL share
+    one in-flight fetch. Fetches are capped per host, and a host that
+    keeps timing out is skipped (fallback values) until its circuit
+    breaker cools down.
+    
+    With a deadline, every network step uses at most the remaining
+    budget and the call returns fallback values once it runs out.
     
     Args:
         url: URL to fetch metadata from
+        deadline: Budget of the update being processed (None = no limit
+            beyond METADATA_TIMEOUT)
         
     Returns:
         Dictionary with 'title' and 'description' keys
     """
-    metadata = {
-        'title': 'Untitled Content',
-        'description': 'No description available'
-    }
+    key = clean_url(url) or url
     
+    cached = await metadata_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    if deadline is not None and deadline.expired:
+        metrics.count("fetch_deadline_exceeded")
+        return _fallback_metadata()
+    
+    fetch = in_flight.do(key, lambda: _fetch_and_cache(url, key, deadline))
+    if deadline is None:
+        return dict(await fetch)
+    
+    # A coalesced fetch runs on its leader's budget; stop waiting at ours
     try:
-        # Special handling for YouTube URLs (use oEmbed)
-        if 'youtube.com' in url or 'youtu.be' in url:
-            youtube_metadata = await _fetch_youtube_oembed(url)
-            if youtube_metadata:
-                return youtube_metadata
+        return dict(await asyncio.wait_for(fetch, deadline.remaining))
+    except asyncio.TimeoutError:
+        metrics.count("fetch_deadline_exceeded")
+        return _fallback_metadata()
 
-        async with httpx.AsyncClient(
-            timeout=config.METADATA_TIMEOUT,
-            follow_redirects=True,
-            headers={'User-Agent': config.USER_AGENT}
-        ) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            
-            # Only process HTML content
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                return metadata
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Extract title
-            title = _extract_title(soup)
-            if title:
-                metadata['title'] = title
-            
-            # Extract description
-            description = _extract_description(soup)
-            if description:
-                metadata['description'] = description
-                
-    except httpx.TimeoutException:
-        # Timeout - use fallback
-        pass
-    except httpx.HTTPStatusError:
-        # HTTP error - use fallback
-        pass
-    except Exception:
-        # Any other error - use fallback
-        pass
+
+async def _fetch_and_cache(url: str, key: str, deadline: Optional[Deadline]) -> Dict[str, str]:
+    """Fetch through the host guard and cache the result (single-flight leader)"""
+    host = urlparse(url).hostname or ''
+    async with host_guard.slot(host, time_budget(deadline, config.METADATA_TIMEOUT)) as slot:
+        if not slot.admitted:
+            # Not cached: the host is retried once the guard lets it through
+            return _fallback_metadata()
+        metadata, outcome = await _fetch_metadata_uncached(url, deadline)
+        
+        # Our budget ran out, not the host's patience: don't record or cache it
+        if outcome == FETCH_UNREACHABLE and deadline is not None and deadline.expired:
+            slot.skip_record = True
+            return metadata
+        slot.failed = outcome == FETCH_UNREACHABLE
     
+    await metadata_cache.set(key, metadata, negative=outcome != FETCH_OK)
     return metadata
 
 
-async def _fetch_youtube_oembed(url: str) -> Optional[Dict[str, str]]:
+async def _fetch_metadata_uncached(
+    url: str,
+    deadline: Optional[Deadline] = None
+) -> Tuple[Dict[str, str], str]:
     """
-    Fetch metadata from YouTube oEmbed API
-    Reliable way to get video title and author
+    Fetch metadata from the network
+    
+    Returns:
+        Tuple of (metadata, outcome) where outcome is FETCH_OK,
+        FETCH_FAILED or FETCH_UNREACHABLE
     """
-    oembed_url = f"https://www.youtube.com/oembed?url={url}&format=json"
+    metadata = _fallback_metadata()
     
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(oembed_url)
-            if response.status_code == 200:
-                data = response.json()
-                title = data.get('title')
-                author = data.get('author_name')
-                
-                if title:
-                    return {
-                        'title': title,
-                        'description': f"Video by {author}" if author else "YouTube Video"
-                    }
-    except Exception:
-        pass
-        
-    return None
+        # Known oEmbed providers (YouTube, Vimeo, Spotify, ...): one small
+        # JSON call instead of the page
+        provider = OEMBED_REGISTRY.match(url)
+        if provider:
+            oembed_metadata = await _fetch_oembed(url, *provider, deadline=deadline)
+            if oembed_metadata:
+                return oembed_metadata, FETCH_OK
 
-
-def _extract_title(soup: BeautifulSoup) -> Optional[str]:
-    """
-    Extract title from HTML with priority order
-    
-    Args:
-        soup: BeautifulSoup object
+        client = get_client(WEB_POOL)
+        tracer = metrics.fetch_tracer()
+        extensions = {'trace': tracer} if tracer else None
+        timeout = time_budget(deadline, config.METADATA_TIMEOUT)
+        async with client.stream('GET', url, timeout=timeout, extensions=extensions) as response:
+            response.raise_for_status()
+            
+            # Only process HTML content
+            content_type = response.headers.get('content-type', '').lower()
+            if 'text/html' not in content_type:
+                return metadata, FETCH_OK
+            
+            # Stream only as much of the body as needed to cover <head>.
+            # Parsing is incremental, so the stage timer covers reading the
+            # body and parsing it together (hence 'fetch_read_parse')
+            read_started = time.perf_counter()
+            encoding = response.charset_encoding
+            root = await read_head(
+                response.aiter_bytes(),
+                config.METADATA_MAX_BYTES,
+                encoding
+            )
         
-    Returns:
-        Extracted title or None
-    """
-    # 1. Try Open Graph title
-    og_title = soup.find('meta', property='og:title')
-    if og_title and og_title.get('content'):
-        return og_title['content'].strip()
-    
-    # 2. Try Twitter title
-    twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
-    if twitter_title and twitter_title.get('content'):
-        return twitter_title['content'].strip()
-    
-    # 3. Try regular meta title
-    meta_title = soup.find('meta', attrs={'name': 'title'})
-    if meta_title and meta_title.get('content'):
-        return meta_title['content'].strip()
-    
-    # 4. Try <title> tag
-    title_tag = soup.find('title')
-    if title_tag and title_tag.string:
-        return title_tag.string.strip()
+        # Collect all head candidates in one pass
+        candidates = collect_head_candidates(root)
+        metrics.observe('fetch_read_parse', time.perf_counter() - read_started)
+        
+        # Extract title
+        title = pick_title(candidates)
+        if title:
+            metadata['title'] = title
+        
+        # Extract description
+        description = pick_description(candidates)
+        if description:
+            metadata['description'] = description
+                
+    except httpx.TransportError as e:
+        # Private/reserved address - refused, not the host's fault
+        if isinstance(e.__cause__, BlockedAddressError):
+            return metadata, FETCH_FAILED
+        # Timeout or connection error - use fallback
+        return metadata, FETCH_UNREACHABLE
+    except httpx.HTTPStatusError as e:
+        # HTTP error - use fallback
+        if e.response.status_code >= 500:
+            return metadata, FETCH_UNREACHABLE
+        return metadata, FETCH_FAILED
+    except Exception:
+        # Any other error - use fallback
+        return metadata, FETCH_FAILED
     
-    return None
+    return metadata, FETCH_OK
 
 
-def _extract_description(soup: BeautifulSoup) -> Optional[str]:
+async def _fetch_oembed(
+    url: str,
+    provider: str,
+    endpoint: str,
+    deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, str]]:
     """
-    Extract description from HTML with priority order
+    Fetch metadata from the provider's oEmbed endpoint
+    A small JSON call instead of downloading the page
     
     Args:
-        soup: BeautifulSoup object
+        url: Link being resolved
+        provider: Provider name from the registry
+        endpoint: oEmbed endpoint URL
+        deadline: Update budget
         
     Returns:
-        Extracted description or None
+        Metadata dict, or None to fall back to the page fetch
     """
-    # 1. Try Open Graph description
-    og_desc = soup.find('meta', property='og:description')
-    if og_desc and og_desc.get('content'):
-        return og_desc['content'].strip()
-    
-    # 2. Try Twitter description
-    twitter_desc = soup.find('meta', attrs={'name': 'twitter:description'})
-    if twitter_desc and twitter_desc.get('content'):
-        return twitter_desc['content'].strip()
-    
-    # 3. Try regular meta description
-    meta_desc = soup.find('meta', attrs={'name': 'description'})
-    if meta_desc and meta_desc.get('content'):
-        return meta_desc['content'].strip()
+    try:
+        client = get_client(OEMBED_POOL)
+        response = await client.get(
+            endpoint,
+            params={'url': url, 'format': 'json'},
+            timeout=time_budget(deadline, config.METADATA_TIMEOUT)
+        )
+        if response.status_code == 200:
+            metadata = oembed_to_metadata(response.json(), provider)
+            if metadata:
+                metrics.count('oembed_hit')
+                return metadata
+    except Exception:
+        pass
     
+    metrics.count('oembed_miss')
     return None
@@ -0,0 +1,201 @@
+"""
+oEmbed provider registry
+Maps links to their provider's oEmbed endpoint so supported sites are
+resolved with one small JSON call instead of a full page download
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import urlparse
+from lxml import html as lxml_html
+from .. import config
+
+
+# Trimmed copy of https://oembed.com/providers.json
+BUNDLED_PROVIDERS = Path(__file__).parent / 'oembed_providers.json'
+
+# oEmbed 'type' -> wording used in the description
+TYPE_LABELS = {'video': 'Video', 'photo': 'Photo'}
+
+
+def _compile_scheme(scheme: str) -> Optional[Tuple[str, str]]:
+    """
+    Turn an oEmbed URL scheme into (index key, regex source)
+
+    '*' matches within one host label in the host and anything in the
+    path; a leading '*.' also matches the bare domain. Schemes whose host
+    cannot be indexed get an empty key.
+
+    Returns:
+        (host key, regex source), or None for non-HTTP schemes
+    """
+    match = re.match(r'https?://([^/]+)(.*)$', scheme, re.IGNORECASE)
+    if not match:
+        return None
+    host, rest = match.groups()
+    host = host.lower()
+
+    if host.startswith('*.'):
+        host_regex = r'(?:[^/?#]*\.)?' + re.escape(host[2:]).replace(r'\*', r'[^/?#.]*')
+        key = host[2:]
+    else:
+        host_regex = re.escape(host).replace(r'\*', r'[^/?#.]*')
+        key = host
+    if '*' in key:
+        key = ''
+
+    path_regex = re.escape(rest).replace(r'\*', '.*')
+    return key, r'https?://' + host_regex + r'(?::\d+)?' + path_regex
+
+
+class OembedRegistry:
+    """
+    Provider endpoints indexed by host
+
+    Schemes are grouped per (host, endpoint) into one precompiled regex, and
+    a link only tries the groups registered under its own host or one of
+    its parent domains.
+    """
+
+    def __init__(self):
+        self._by_host: Dict[str, List[Tuple[Pattern, str, str]]] = {}
+        self._unindexed: List[Tuple[Pattern, str, str]] = []
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._by_host.values()) + len(self._unindexed)
+
+    def add(self, provider: str, endpoint: str, schemes: List[str]) -> None:
+        """
+        Register an endpoint
+
+        Args:
+            provider: Provider name (e.g. 'Vimeo')
+            endpoint: oEmbed endpoint URL ('{format}' is replaced with 'json')
+            schemes: oEmbed URL schemes with '*' wildcards
+        """
+        endpoint = endpoint.replace('{format}', 'json')
+        grouped: Dict[str, List[str]] = {}
+        for scheme in schemes:
+            compiled = _compile_scheme(scheme)
+            if compiled:
+                key, regex = compiled
+                grouped.setdefault(key, []).append(regex)
+
+        for key, regexes in grouped.items():
+            pattern = re.compile('(?:' + '|'.join(regexes) + ')', re.IGNORECASE)
+            entry = (pattern, provider, endpoint)
+            if key:
+                self._by_host.setdefault(key, []).append(entry)
+            else:
+                self._unindexed.append(entry)
+
+    def match(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the oEmbed endpoint for a link
+
+        Args:
+            url: Link to resolve
+
+        Returns:
+            (provider name, endpoint URL), or None if no provider matches
+        """
+        try:
+            host = (urlparse(url).hostname or '').rstrip('.')
+        except ValueError:
+            return None
+        if not host:
+            return None
+
+        labels = host.split('.')
+        for i in range(len(labels)):
+            for pattern, provider, endpoint in self._by_host.get('.'.join(labels[i:]), ()):
+                if pattern.fullmatch(url):
+                    return provider, endpoint
+
+        for pattern, provider, endpoint in self._unindexed:
+            if pattern.fullmatch(url):
+                return provider, endpoint
+        return None
+
+    @classmethod
+    def from_providers(cls, providers: List[Dict[str, Any]]) -> 'OembedRegistry':
+        """Build from the standard providers.json structure"""
+        registry = cls()
+        for provider in providers:
+            name = provider.get('provider_name', '')
+            for endpoint in provider.get('endpoints', []):
+                if endpoint.get('url') and endpoint.get('schemes'):
+                    registry.add(name, endpoint['url'], endpoint['schemes'])
+        return registry
+
+
+def load_providers(path: Path) -> OembedRegistry:
+    """
+    Load a registry from a providers.json file
+
+    Args:
+        path: File in the https://oembed.com/providers.json format
+
+    Returns:
+        OembedRegistry
+    """
+    with open(path, encoding='utf-8') as f:
+        return OembedRegistry.from_providers(json.load(f))
+
+
+def _build_registry() -> OembedRegistry:
+    """OEMBED_PROVIDERS_FILE if set and readable, else the bundled providers"""
+    if config.OEMBED_PROVIDERS_FILE:
+        try:
+            return load_providers(Path(config.OEMBED_PROVIDERS_FILE))
+        except (OSError, ValueError) as e:
+            print(f"Could not load oEmbed providers from {config.OEMBED_PROVIDERS_FILE}: {e}")
+    return load_providers(BUNDLED_PROVIDERS)
+
+
+OEMBED_REGISTRY = _build_registry()
+
+
+def oembed_to_metadata(data: Dict[str, Any], provider: str) -> Optional[Dict[str, str]]:
+    """
+    Map an oEmbed response to title/description
+
+    Providers without a 'title' (e.g. Twitter/X) get the text of their
+    embed HTML instead.
+
+    Args:
+        data: Decoded oEmbed JSON
+        provider: Provider name from the registry
+
+    Returns:
+        Metadata dict, or None if the response has nothing usable
+    """
+    provider = data.get('provider_name') or provider
+    author = data.get('author_name')
+    title = data.get('title')
+
+    if not title and data.get('html'):
+        try:
+            fragment = lxml_html.fragment_fromstring(data['html'], create_parent='div')
+            # Post text sits in the first <p>; the rest is byline and links
+            paragraphs = fragment.xpath('.//p')
+            text = ' '.join((paragraphs[0] if paragraphs else fragment).text_content().split())
+        except Exception:
+            text = ''
+        if text:
+            title = text if len(text) <= 200 else text[:197].rstrip() + '...'
+
+    if not title:
+        return None
+
+    label = TYPE_LABELS.get(data.get('type', ''))
+    if data.get('description'):
+        description = data['description']
+    elif author:
+        description = f"{label} by {author}" if label else f"By {author} on {provider}"
+    else:
+        description = f"{provider} {label}" if label else f"On {provider}"
+
+    return {'title': title, 'description': description}
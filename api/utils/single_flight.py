@@ -0,0 +1,53 @@
+"""
+Single-flight call coalescing
+Concurrent callers asking for the same key share one in-flight task
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Map of key -> running task; later callers await the running one
+
+    The shared task is shielded, so a caller that gives up (cancelled, timed
+    out) does not cancel the work other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {'leaders': 0, 'coalesced': 0}
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() for key, or join the run already in progress
+
+        Args:
+            key: Coalescing key
+            factory: Called (only by the first caller) to start the work
+
+        Returns:
+            The shared result (callers must not mutate it)
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.stats['leaders'] += 1
+        else:
+            self.stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved even if every caller gave up
+        if not task.cancelled():
+            task.exception()
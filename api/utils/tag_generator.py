@@ -3,11 +3,17 @@ Advanced tag generation with intelligent keyword extraction
 Uses NLP-inspired techniques for better, more relevant tags
 """
 
+import heapq
 import re
-from typing import List, Set, Optional, Dict, Tuple
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import List, Optional, Dict, Set, Tuple
 from urllib.parse import urlparse
 from collections import Counter
 from .. import config
+from .domain_matcher import DomainTrie, load_domain_rules
+from .idf import IdfTable, load_idf
+from .keyword_matcher import KeywordAutomaton
 
 
 # Enhanced stop words (expanded list)
@@ -25,6 +31,26 @@ STOP_WORDS = {
     'available', 'description', 'content', 'title', 'link', 'url'
 }
 
+# Words of 3+ chars starting with a letter
+TOKEN_PATTERN = re.compile(r'\b[a-zA-Z][a-zA-Z0-9]{2,}\b')
+
+# Same, plus the NUL placed between fields so all fields are tokenized in
+# one findall and the field breaks show up as tokens
+FIELD_BREAK = '\x00'
+FIELDS_TOKEN_PATTERN = re.compile(r'\b[a-zA-Z][a-zA-Z0-9]{2,}\b|\x00')
+
+# Fields with more tokens than this are counted with Counter first (C speed);
+# shorter ones are cheaper to walk directly
+COUNTER_MIN_TOKENS = 32
+NON_ALNUM_PATTERN = re.compile(r'[^a-zA-Z0-9]')
+
+# Keyword weight per field: title, description, caption
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.5
+CAPTION_WEIGHT = 1.0
+PRIORITY_BOOST = 2.0
+MAX_CANDIDATES = 15
+
 # Domain-based tag mapping with priority tags
 DOMAIN_TAGS = {
     'youtube.com': ['Video', 'YT', 'YouTube'],
@@ -102,6 +128,91 @@ CATEGORY_KEYWORDS = {
     'sports': ['sports', 'football', 'basketball', 'soccer', 'cricket', 'athlete'],
 }
 
+# Multi-word phrases that map onto a PRIORITY_KEYWORDS entry
+PRIORITY_PHRASES = {
+    'machine learning': 'machinelearning',
+    'deep learning': 'deeplearning',
+    'neural network': 'neuralnetwork',
+    'neural networks': 'neuralnetwork',
+    'large language model': 'llm',
+    'large language models': 'llm',
+    'amazon web services': 'aws',
+    'google cloud': 'gcp',
+    'google cloud platform': 'gcp',
+    'full stack': 'fullstack',
+    'front end': 'frontend',
+    'back end': 'backend',
+    'web socket': 'websocket',
+    'web sockets': 'websocket',
+    'continuous integration': 'cicd',
+}
+
+# Word endings accepted for category keywords ('game' also matches 'games')
+CATEGORY_SUFFIXES = ('', 's', 'es', 'ing', 'ed', 'er', 'ers')
+
+
+def _build_keyword_automaton() -> KeywordAutomaton:
+    """
+    Compile priority keywords, phrases and category keywords into one automaton
+
+    Hit values are (kind, target) tuples:
+    ('priority', key), ('phrase', key) or ('category', index in CATEGORY_KEYWORDS)
+    """
+    return KeywordAutomaton.from_items(chain(
+        ((keyword, ('priority', keyword)) for keyword in PRIORITY_KEYWORDS),
+        ((phrase, ('phrase', keyword)) for phrase, keyword in PRIORITY_PHRASES.items()),
+        (
+            (keyword + suffix, ('category', index))
+            for index, keywords in enumerate(CATEGORY_KEYWORDS.values())
+            for keyword in keywords
+            for suffix in CATEGORY_SUFFIXES
+        ),
+    ))
+
+
+KEYWORD_AUTOMATON = _build_keyword_automaton()
+CATEGORY_NAMES = list(CATEGORY_KEYWORDS)
+
+
+def _build_domain_trie() -> DomainTrie:
+    """DOMAIN_TAGS plus any rules from DOMAIN_TAGS_FILE (file rules win)"""
+    trie = DomainTrie()
+    trie.update(DOMAIN_TAGS.items())
+    if config.DOMAIN_TAGS_FILE:
+        try:
+            trie.update(load_domain_rules(config.DOMAIN_TAGS_FILE))
+        except (OSError, ValueError) as e:
+            print(f"Could not load domain tag rules from {config.DOMAIN_TAGS_FILE}: {e}")
+    return trie
+
+
+DOMAIN_TRIE = _build_domain_trie()
+
+# Corpus IDF table, loaded on first use from TAG_IDF_PATH
+_idf_table: Optional[IdfTable] = None
+_idf_loaded = False
+
+
+def _get_idf() -> Optional[IdfTable]:
+    """IDF table from TAG_IDF_PATH (None if unset or unreadable)"""
+    global _idf_table, _idf_loaded
+    if not _idf_loaded:
+        _idf_loaded = True
+        if config.TAG_IDF_PATH:
+            try:
+                _idf_table = load_idf(config.TAG_IDF_PATH)
+            except (OSError, ValueError) as e:
+                print(f"Could not load IDF vocabulary from {config.TAG_IDF_PATH}: {e}")
+    return _idf_table
+
+
+def tokenize_terms(text: str) -> List[str]:
+    """Lowercase, stop-word-filtered terms as scored by generate_tags"""
+    return [
+        key for key in (word.lower() for word in TOKEN_PATTERN.findall(text))
+        if key not in STOP_WORDS
+    ]
+
 
 def generate_tags(
     title: str = '',
@@ -117,6 +228,7 @@ def generate_tags(
     1. Extract domain-specific tags (highest priority)
     2. Score keywords using TF-IDF-like approach
     3. Detect categories and add contextual tags
+       (priority and category keywords are matched in one automaton scan)
     4. Filter and rank by relevance
     5. Return top 5-6 most relevant tags
     
@@ -130,7 +242,8 @@ def generate_tags(
     Returns:
         List of 5-6 most relevant hashtags
     """
-    tags: Set[str] = set()
+    # Insertion-ordered set, so tags come out in priority order
+    tags: Dict[str, None] = {}
     max_tags = 6
     
     # Priority 1: Domain-based tags (always include for known domains)
@@ -138,41 +251,34 @@ def generate_tags(
         domain_tags = _get_domain_tags(url)
         # Take first 3 domain tags max to leave room for content tags
         for tag in domain_tags[:3]:
-            tags.add(tag)
+            tags[tag] = None
     
     # Priority 2: Extract and score keywords from content
-    keyword_scores = _extract_scored_keywords(title, description, caption)
+    keyword_scores, category = _extract_scored_keywords(title, description, caption)
     
     # Priority 3: Add high-value tech/topic keywords
-    for keyword, score in keyword_scores:
+    for keyword, word, score in keyword_scores:
         if len(tags) >= max_tags:
             break
         
         # Check if it's a priority keyword
-        normalized_keyword = keyword.lower().replace(' ', '')
-        if normalized_keyword in PRIORITY_KEYWORDS:
-            tag = PRIORITY_KEYWORDS[normalized_keyword]
-            if tag not in tags:
-                tags.add(tag)
+        if keyword in PRIORITY_KEYWORDS:
+            tags[PRIORITY_KEYWORDS[keyword]] = None
         else:
             # Regular keyword
-            tag = _normalize_tag(keyword)
-            if tag and tag not in tags and len(tag) >= 3:
-                tags.add(tag)
+            tag = _normalize_tag(word)
+            if tag:
+                tags[tag] = None
     
     # Priority 4: Add category tag if detected
-    if len(tags) < max_tags:
-        category = _detect_category(f"{title} {description} {caption}".lower())
-        if category:
-            tag = category.capitalize()
-            if tag not in tags:
-                tags.add(tag)
+    if len(tags) < max_tags and category:
+        tags[category.capitalize()] = None
     
     # Priority 5: Add media type if not covered
     if media_type and len(tags) < max_tags:
         media_tag = _get_media_tag(media_type)
-        if media_tag and media_tag not in tags:
-            tags.add(media_tag)
+        if media_tag:
+            tags[media_tag] = None
     
     # Convert to hashtag list
     tag_list = [f"#{tag}" for tag in list(tags)[:max_tags]]
@@ -184,76 +290,133 @@ def generate_tags(
     return tag_list
 
 
-def _extract_scored_keywords(title: str, description: str, caption: str) -> List[Tuple[str, float]]:
+def merge_tags(tag_lists: List[List[str]], max_tags: int) -> List[str]:
     """
-    Extract keywords with TF-IDF-like scoring
-    Title words get 3x weight, description 1.5x, caption 1x
+    Merge the tags of several links into one list
+    
+    Tags shared by more links rank first. Ties go to the tag ranked
+    higher within its own list, so every link's best tags make the cut
+    before any link's weaker ones; remaining ties keep first-seen order.
+    The '#Content' placeholder is only used when nothing else is left.
+    
+    Args:
+        tag_lists: Hashtag lists from generate_tags, one per link
+        max_tags: Max tags to return
+        
+    Returns:
+        Merged hashtag list
     """
-    # Tokenize and weight
-    title_words = _tokenize(title)
-    desc_words = _tokenize(description)
-    caption_words = _tokenize(caption)
+    counts: Dict[str, int] = {}
+    best_rank: Dict[str, int] = {}
+    for tag_list in tag_lists:
+        for rank, tag in enumerate(tag_list):
+            if tag != '#Content':
+                counts[tag] = counts.get(tag, 0) + 1
+                best_rank[tag] = min(best_rank.get(tag, rank), rank)
     
-    # Count with weights
-    word_scores: Dict[str, float] = {}
+    # sorted() is stable, so full ties stay in first-seen order
+    merged = sorted(counts, key=lambda tag: (-counts[tag], best_rank[tag]))[:max_tags]
+    return merged or ['#Content']
+
+
+def _extract_scored_keywords(
+    title: str,
+    description: str,
+    caption: str
+) -> Tuple[List[Tuple[str, str, float]], Optional[str]]:
+    """
+    Extract keywords with TF-IDF scoring and detect the content category
+    Title words get 3x weight, description 1.5x, caption 1x; with
+    TAG_IDF_PATH set, scores are also multiplied by the term's corpus IDF
     
-    for word in title_words:
-        word_scores[word] = word_scores.get(word, 0) + 3.0
+    All fields are tokenized in one findall over the NUL-joined text.
+    Keywords are case-insensitive: 'Python' and 'python' add up under one
+    lowercase key, displayed with the first spelling seen (title first).
+    Priority and category keywords are looked up in KEYWORD_AUTOMATON once
+    per distinct keyword; the ordered token streams are scanned only when
+    a multi-word phrase could be present.
     
-    for word in desc_words:
-        word_scores[word] = word_scores.get(word, 0) + 1.5
+    Returns:
+        Tuple of (top candidates as (lowercase keyword, original word, score),
+        category name or None)
+    """
+    word_scores: Dict[str, float] = {}
+    surface: Dict[str, str] = {}
+    boosted: Set[str] = set()
+    category_index: Optional[int] = None
+    phrase_starts = KEYWORD_AUTOMATON.phrase_starts
     
-    for word in caption_words:
-        word_scores[word] = word_scores.get(word, 0) + 1.0
+    tokens = FIELDS_TOKEN_PATTERN.findall(f"{title}{FIELD_BREAK}{description}{FIELD_BREAK}{caption}")
+    first_break = tokens.index(FIELD_BREAK)
+    second_break = tokens.index(FIELD_BREAK, first_break + 1)
     
-    # Boost priority keywords
-    for word in word_scores:
-        normalized = word.lower().replace(' ', '')
-        if normalized in PRIORITY_KEYWORDS:
-            word_scores[word] *= 2.0
+    for field_tokens, weight in (
+        (tokens[:first_break], TITLE_WEIGHT),
+        (tokens[first_break + 1:second_break], DESCRIPTION_WEIGHT),
+        (tokens[second_break + 1:], CAPTION_WEIGHT),
+    ):
+        if len(field_tokens) > COUNTER_MIN_TOKENS:
+            counted = Counter(field_tokens).items()
+        else:
+            counted = zip(field_tokens, repeat(1))
+        
+        for word, count in counted:
+            key = word.lower()
+            if key in word_scores:
+                word_scores[key] += weight * count
+            elif key not in STOP_WORDS:
+                word_scores[key] = weight * count
+                surface[key] = word
+        
+        # Multi-word phrases need the ordered token stream
+        if not phrase_starts.isdisjoint(word_scores):
+            for kind, target in KEYWORD_AUTOMATON.scan(map(str.lower, field_tokens)):
+                if kind == 'phrase':
+                    # Score a phrase like one occurrence of its keyword
+                    word_scores[target] = word_scores.get(target, 0) + weight
+                    surface.setdefault(target, target)
+                    boosted.add(target)
     
-    # Sort by score
-    sorted_keywords = sorted(word_scores.items(), key=lambda x: x[1], reverse=True)
+    # Single-word patterns only need the distinct keywords (none are stop words)
+    word_values = KEYWORD_AUTOMATON.word_values
+    for key in word_scores:
+        hits = word_values.get(key)
+        if hits:
+            for kind, target in hits:
+                if kind == 'category':
+                    if category_index is None or target < category_index:
+                        category_index = target
+                else:
+                    boosted.add(target)
     
-    return sorted_keywords[:15]  # Top 15 candidates
-
-
-def _tokenize(text: str) -> List[str]:
-    """Extract meaningful words from text"""
-    if not text:
-        return []
+    # Weight by corpus rarity when an IDF vocabulary is configured
+    idf = _get_idf()
+    if idf is not None:
+        weights, default = idf.weights, idf.default
+        for key in word_scores:
+            word_scores[key] *= weights.get(key, default)
     
-    # Extract words (3+ chars, alphanumeric)
-    words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9]{2,}\b', text)
+    # Boost priority keywords
+    for key in boosted:
+        if key in word_scores:
+            word_scores[key] *= PRIORITY_BOOST
     
-    # Filter stop words
-    filtered = [w for w in words if w.lower() not in STOP_WORDS]
+    # A heap only pays off once there are many more candidates than slots
+    if len(word_scores) > 4 * MAX_CANDIDATES:
+        top = heapq.nlargest(MAX_CANDIDATES, word_scores.items(), key=itemgetter(1))
+    else:
+        top = sorted(word_scores.items(), key=itemgetter(1), reverse=True)[:MAX_CANDIDATES]
+    category = CATEGORY_NAMES[category_index] if category_index is not None else None
     
-    return filtered
-
-
-def _detect_category(text: str) -> Optional[str]:
-    """Detect content category from keywords"""
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in text:
-                return category
-    return None
+    return [(key, surface[key], score) for key, score in top], category
 
 
 def _get_domain_tags(url: str) -> List[str]:
     """Get tags based on URL domain"""
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
-        
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        for domain_pattern, tags in DOMAIN_TAGS.items():
-            if domain_pattern in domain:
-                return tags if isinstance(tags, list) else [tags]
-                
+        host = urlparse(url).hostname
+        if host:
+            return DOMAIN_TRIE.lookup(host)
     except Exception:
         pass
     
@@ -277,7 +440,7 @@ def _get_media_tag(media_type: str) -> Optional[str]:
 def _normalize_tag(tag: str) -> Optional[str]:
     """Normalize tag to proper hashtag format"""
     # Remove special characters
-    normalized = re.sub(r'[^a-zA-Z0-9]', '', tag)
+    normalized = NON_ALNUM_PATTERN.sub('', tag)
     
     # Capitalize properly (preserve camelCase if exists)
     if normalized and not normalized[0].isupper():
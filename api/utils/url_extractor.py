@@ -4,10 +4,15 @@ URL extraction and validation utilities
 
 import re
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from .. import config
 
 
+# Entity types that carry a link: 'url' is visible in the text, 'text_link'
+# hides its target behind other text
+URL_ENTITY_TYPES = ('url', 'text_link')
+
+
 def extract_urls(text: str) -> List[str]:
     """
     Extract all HTTP/HTTPS URLs from text
@@ -37,6 +42,62 @@ def extract_urls(text: str) -> List[str]:
     return valid_urls
 
 
+def _entity_url(text: str, encoded: Optional[bytes], entity: Dict[str, Any]) -> Optional[str]:
+    """Link target of one entity ('encoded' is the UTF-16 text, None if text is ASCII)"""
+    if entity.get('type') == 'text_link':
+        return entity.get('url')
+
+    offset, length = entity.get('offset', 0), entity.get('length', 0)
+    if encoded is None:
+        url = text[offset:offset + length]
+    else:
+        # Telegram offsets count UTF-16 code units
+        url = encoded[offset * 2:(offset + length) * 2].decode('utf-16-le', errors='ignore')
+    # Clients link bare domains ('example.com') too
+    if url and '://' not in url:
+        url = 'http://' + url
+    return url
+
+
+def extract_message_urls(message: Dict[str, Any]) -> List[str]:
+    """
+    Extract URLs from a message using the entities Telegram sends with it
+    
+    Reads the 'url' and 'text_link' entities of the text (or of the caption
+    if there is no text), which also finds links hidden behind text_link
+    formatting. Messages without an entities list are scanned with
+    extract_urls instead.
+    
+    Args:
+        message: Telegram message object
+        
+    Returns:
+        List of valid URLs in message order
+    """
+    if message.get('text'):
+        text, entities = message['text'], message.get('entities')
+    else:
+        text, entities = message.get('caption') or '', message.get('caption_entities')
+    
+    if entities is None:
+        return extract_urls(text)
+    
+    link_entities = [entity for entity in entities if entity.get('type') in URL_ENTITY_TYPES]
+    if not link_entities:
+        return []
+    encoded = None if text.isascii() else text.encode('utf-16-le')
+    
+    valid_urls = []
+    for entity in link_entities:
+        url = _entity_url(text, encoded, entity)
+        if url and is_valid_url(url):
+            cleaned = clean_url(url)
+            if cleaned:
+                valid_urls.append(cleaned)
+    
+    return valid_urls
+
+
 def is_valid_url(url: str) -> bool:
     """
     Validate if URL is properly formed and not pointing to private IPs
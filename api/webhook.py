@@ -6,92 +6,86 @@ Framework: FastAPI
 Architecture: Stateless serverless functions
 """
 
-import os
-import re
-from datetime import datetime
-from typing import Optional, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
-import httpx
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 # Import local modules
-from .config import BOT_TOKEN, validate_config
-from .utils import (
-    get_first_valid_url,
-    fetch_metadata,
-    generate_tags,
-    format_response,
-    get_current_ist_time
-)
+from . import config, metrics
+from .config import validate_config
+from .utils.http_client import open_clients, close_clients
+from .batch import process_batch
+from .deadline import Deadline
+from .dedup import UpdateDeduplicator
+from .pipeline import handle_update, process_update
+from .scheduler import ChatScheduler
+from .telegram import send_message
+from .update_decoder import decode_update
 
 # Validate configuration on startup
 validate_config()
 
-# Initialize FastAPI app
-app = FastAPI(title="Telegram Content Formatter Bot")
 
-# Telegram API endpoint
-TELEGRAM_API_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared HTTP pools and the work queue on startup, drain and close them on shutdown"""
+    await open_clients()
+    if config.PROCESSING_MODE == "background":
+        update_queue.start()
+    yield
+    await update_queue.drain(config.QUEUE_DRAIN_TIMEOUT)
+    await close_clients()
 
 
-async def send_message(chat_id: int, text: str, parse_mode: str = "HTML") -> Dict[str, Any]:
-    """
-    Send message to Telegram chat
-    
-    Args:
-        chat_id: Telegram chat ID
-        text: Message text
-        parse_mode: Parse mode (HTML or Markdown)
-        
-    Returns:
-        API response
-    """
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.post(
-            f"{TELEGRAM_API_URL}/sendMessage",
-            json={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": parse_mode
-            }
-        )
-        return response.json()
+# Initialize FastAPI app
+app = FastAPI(title="Telegram Content Formatter Bot", lifespan=lifespan)
 
 
-def get_media_type(message: Dict[str, Any]) -> str:
+async def send_reply(reply: Dict[str, Any], deadline: Optional[Deadline] = None) -> JSONResponse:
     """
-    Detect media type from message
+    Deliver a reply and build the webhook HTTP response
+    
+    In 'inline' reply mode the sendMessage call is returned as the webhook
+    response body, so Telegram performs it without an extra outbound request.
+    Telegram does not report the result of inline calls back to the bot.
     
     Args:
-        message: Telegram message object
+        reply: Reply dict with 'chat_id' and 'text'
+        deadline: Update budget for the sendMessage call
         
     Returns:
-        Media type string or empty string
+        JSONResponse for Telegram
     """
-    media_types = ['photo', 'video', 'audio', 'voice', 'document', 'animation', 'sticker']
-    for media_type in media_types:
-        if media_type in message:
-            return media_type
-    return ''
+    if config.WEBHOOK_REPLY_MODE == "inline":
+        return JSONResponse({
+            "method": "sendMessage",
+            "chat_id": reply["chat_id"],
+            "text": reply["text"],
+            "parse_mode": "HTML"
+        })
+    
+    await send_message(reply["chat_id"], reply["text"], deadline=deadline)
+    return JSONResponse({"ok": True})
 
 
-def format_media_only_message(media_type: str, timestamp: datetime) -> str:
-    """Format message for media without caption"""
-    emoji_map = {
-        'photo': '🖼️', 'video': '🎥', 'audio': '🎵', 'voice': '🎤',
-        'document': '📄', 'animation': '🎬', 'sticker': '✨'
-    }
-    
-    emoji = emoji_map.get(media_type.lower(), '📎')
-    date = timestamp.strftime("%d %b %Y")
-    time = timestamp.strftime("%I:%M %p IST")
-    
-    return (
-        f"{emoji} <b>{media_type.capitalize()} Received</b>\n\n"
-        f"ℹ️ No caption or text provided.\n\n"
-        f"📅 <b>Date:</b> {date}\n"
-        f"⏰ <b>Time:</b> {time}"
-    )
+deduplicator = UpdateDeduplicator(config.DEDUP_WINDOW, config.DEDUP_DB or None)
+
+update_queue = ChatScheduler(
+    process_update,
+    max_size=config.QUEUE_MAX_SIZE,
+    workers=config.QUEUE_WORKERS
+)
+metrics.register_collector(
+    'Updates waiting on the background scheduler',
+    lambda: {"bot_queue_depth": update_queue.depth},
+    metric_type='gauge'
+)
+metrics.register_collector(
+    'Chats with updates waiting or in flight on the background scheduler',
+    lambda: {"bot_queue_active_chats": update_queue.active_chats},
+    metric_type='gauge'
+)
 
 
 @app.get("/")
@@ -100,160 +94,65 @@ async def root():
     return {"status": "ok", "bot": "Telegram Content Formatter", "mode": "webhook"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics (404 unless METRICS_ENABLED)"""
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/")
 async def webhook(request: Request):
     """
     Main webhook handler for Telegram updates
     
-    Processes incoming messages and sends formatted responses
+    Processes incoming messages and sends formatted responses.
+    A JSON array of updates is processed as one batch.
+    Everything runs under one UPDATE_DEADLINE budget started here.
     """
+    deadline = Deadline(config.UPDATE_DEADLINE)
     try:
-        # Parse incoming update
-        update = await request.json()
-        
-        # Extract message (handle both new messages and edited messages)
-        message = update.get("message") or update.get("edited_message")
-        
-        if not message:
-            return JSONResponse({"ok": True})
-        
-        # Get chat ID and user info
-        chat_id = message["chat"]["id"]
-        
-        # Handle commands
-        text = message.get("text", "")
-        
-        if text.startswith("/start"):
-            welcome_message = """
-👋 <b>Welcome to Content Formatter Bot!</b>
-
-I'm a stateless bot that instantly formats any content you send me.
-
-<b>What I do:</b>
-✅ Extract metadata from URLs
-✅ Generate automatic tags
-✅ Format content beautifully
-✅ Add IST timestamps
-
-<b>What I support:</b>
-📝 Text messages
-🔗 URLs and links
-🖼️ Photos with captions
-🎥 Videos with captions
-🎵 Audio with captions
-📄 Documents with captions
-
-<b>Privacy:</b>
-🔒 No data storage
-🔒 No user tracking
-🔒 Instant processing and forgetting
-
-Just send me anything, and I'll format it instantly!
-"""
-            await send_message(chat_id, welcome_message)
-            return JSONResponse({"ok": True})
-        
-        if text.startswith("/help"):
-            help_message = """
-ℹ️ <b>How to use Content Formatter Bot</b>
-
-<b>Simply send me:</b>
-• Any text message
-• URLs (I'll fetch metadata)
-• Photos/Videos/Audio with captions
-• Documents with descriptions
-
-<b>I will reply with:</b>
-📝 Extracted title
-📄 Description
-🔗 Original link
-🏷️ Auto-generated tags
-📅 Date and time (IST)
-
-<b>Examples:</b>
-1. Send a YouTube link → I'll extract video title and description
-2. Send an article URL → I'll fetch the article metadata
-3. Send a photo with caption → I'll format it with tags
-4. Send plain text → I'll structure it nicely
-
-<b>Note:</b> I don't store anything. Every message is processed and forgotten immediately.
-
-Questions? Just send me content and see the magic! ✨
-"""
-            await send_message(chat_id, help_message)
-            return JSONResponse({"ok": True})
-        
-        # Get current timestamp
-        timestamp = get_current_ist_time()
-        
-        # Extract text content (from message or caption)
-        text_content = message.get("text") or message.get("caption") or ''
-        
-        # Detect media type
-        media_type = get_media_type(message)
-        
-        # If no text and no media, skip
-        if not text_content and not media_type:
-            return JSONResponse({"ok": True})
-        
-        # Extract URL from text
-        url = get_first_valid_url(text_content)
-        
-        # Initialize metadata
-        title = 'Untitled Content'
-        description = 'No description available'
-        
-        # Fetch metadata if URL exists
-        if url:
-            try:
-                metadata = await fetch_metadata(url)
-                title = metadata.get('title', title)
-                description = metadata.get('description', description)
-            except Exception:
-                # Continue with fallback values
-                pass
-        
-        # If no URL and no meaningful text, handle media-only case
-        if not url and not text_content.strip():
-            if media_type:
-                response = format_media_only_message(media_type, timestamp)
-                await send_message(chat_id, response)
-            return JSONResponse({"ok": True})
-        
-        # Use text as title if no URL metadata
-        if not url and text_content.strip():
-            # Use first 100 chars as title
-            title = text_content[:100].strip()
-            if len(text_content) > 100:
-                title += '...'
-            # Use full text as description
-            description = text_content.strip()
-        
-        # Generate tags
-        tags = generate_tags(
-            title=title,
-            description=description,
-            caption=text_content,
-            media_type=media_type,
-            url=url
-        )
-        
-        # Format response
-        response = format_response(
-            title=title,
-            description=description,
-            url=url,
-            tags=tags,
-            timestamp=timestamp
-        )
-        
-        # Send reply
-        await send_message(chat_id, response)
-        
-        return JSONResponse({"ok": True})
+        with metrics.timed("update_total"):
+            # Parse incoming update
+            with metrics.timed("json_decode"):
+                update = decode_update(await request.body())
+            
+            # Batched delivery (e.g. from a relay that buffers updates)
+            if isinstance(update, list):
+                fresh = [
+                    item for item in update
+                    if not await deduplicator.is_duplicate(item.get("update_id"))
+                ]
+                metrics.count("update_duplicate", len(update) - len(fresh))
+                await process_batch(fresh, deadline=deadline)
+                return JSONResponse({"ok": True})
+            
+            # Telegram redelivers updates when we are slow to answer
+            if await deduplicator.is_duplicate(update.get("update_id")):
+                metrics.count("update_duplicate")
+                return JSONResponse({"ok": True})
+            
+            # Background mode: acknowledge now, process on the scheduler.
+            # If it stays full, fall through and process inline so the slow
+            # response throttles Telegram's delivery rate (this update may
+            # then overtake earlier ones from its chat).
+            if config.PROCESSING_MODE == "background":
+                if await update_queue.submit(update, config.QUEUE_SUBMIT_TIMEOUT):
+                    metrics.count("update_queued")
+                    return JSONResponse({"ok": True})
+            
+            reply = await handle_update(update, deadline)
+            if not reply:
+                metrics.count("update_ignored")
+                return JSONResponse({"ok": True})
+            
+            metrics.count("update_replied")
+            return await send_reply(reply, deadline)
         
     except Exception as e:
         # Log error but return ok to Telegram
+        metrics.count("update_error")
         print(f"Error processing webhook: {e}")
         return JSONResponse({"ok": True})
 
@@ -0,0 +1,9 @@
+"""
+Benchmarks for the webhook pipeline
+Run modules with `python -m benchmarks.<name>` from the repository root
+"""
+
+import os
+
+# api/__init__.py imports the webhook app, which refuses to start without a token
+os.environ.setdefault("BOT_TOKEN", "0:benchmark")
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark: json.loads of webhook bodies vs the faster decoders
+
+Also checks the error contract of every installed decoder: invalid JSON
+raises ValueError, and valid JSON of an unexpected shape decodes like
+json.loads.
+
+Usage:
+    python -m benchmarks.bench_decode [--repeat N]
+
+Exits with status 1 if a decoder's plans or error behaviour differ.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from api.pipeline import prepare_update
+from api.update_decoder import _msgspec_decoder, _orjson_decoder
+
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'updates'
+
+INVALID_BODIES = (b'', b'{', b'[{"update_id": 1},', b'not json', b'{"update_id": 1}}')
+
+# Valid JSON that does not look like an update (msgspec hands these to its fallback)
+ODD_BODIES = (b'"text"', b'[1, 2]', b'{"message": 5}', b'{"update_id": "1"}', b'null')
+
+
+def load_corpus() -> Dict[str, bytes]:
+    """Recorded update payloads, re-serialised compactly as Telegram sends them"""
+    return {
+        path.name: json.dumps(json.loads(path.read_bytes()), ensure_ascii=False, separators=(',', ':')).encode()
+        for path in sorted(FIXTURES.glob('*.json'))
+    }
+
+
+def load_decoders() -> Dict[str, Callable[[bytes], object]]:
+    decoders = {}
+    for name, factory in (('orjson', _orjson_decoder), ('msgspec', _msgspec_decoder)):
+        decoder = factory()
+        if decoder is None:
+            print(f"{name} not installed, skipping")
+        else:
+            decoders[name] = decoder
+    return decoders
+
+
+def plans(payload) -> list:
+    """What the pipeline makes of a decoded body, for the equivalence check"""
+    updates = payload if isinstance(payload, list) else [payload]
+    result = []
+    for update in updates:
+        plan = prepare_update(update)
+        if plan:
+            plan.pop('timestamp', None)
+        result.append(plan)
+    return result
+
+
+def contract_errors(name: str, decoder: Callable[[bytes], object]) -> List[str]:
+    """Ways the decoder breaks decode_update's contract"""
+    errors = []
+    for body in INVALID_BODIES:
+        try:
+            decoder(body)
+            errors.append(f"{name}: {body!r} decoded instead of raising ValueError")
+        except ValueError:
+            pass
+        except Exception as e:
+            errors.append(f"{name}: {body!r} raised {type(e).__name__}, not ValueError")
+    for body in ODD_BODIES:
+        try:
+            if decoder(body) != json.loads(body):
+                errors.append(f"{name}: {body!r} decoded differently from json.loads")
+        except Exception as e:
+            errors.append(f"{name}: {body!r} raised {type(e).__name__}")
+    return errors
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--repeat', type=int, default=2000, help='iterations per payload')
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus()
+    decoders = load_decoders()
+    totals = dict.fromkeys(['json', *decoders], 0.0)
+    failures: List[str] = []
+
+    # json.loads is the baseline and also the decoder without extra libraries
+    header = f"{'payload':<24}{'bytes':>8}{'json us':>10}"
+    header += ''.join(f"{name + ' us':>13}" for name in decoders)
+    print(header + "  match")
+    for name, body in corpus.items():
+        baseline = timeit.timeit(lambda: json.loads(body), number=args.repeat) / args.repeat
+        totals['json'] += baseline
+        row = f"{name:<24}{len(body):>8}{baseline * 1e6:>10.1f}"
+
+        expected = plans(json.loads(body))
+        mismatched = []
+        for decoder_name, decoder in decoders.items():
+            elapsed = timeit.timeit(lambda: decoder(body), number=args.repeat) / args.repeat
+            totals[decoder_name] += elapsed
+            row += f"{elapsed * 1e6:>13.1f}"
+            if plans(decoder(body)) != expected:
+                mismatched.append(decoder_name)
+        print(row + ('  yes' if not mismatched else '  NO ' + ', '.join(mismatched)))
+        failures += [f"{decoder_name}: plan differs for {name}" for decoder_name in mismatched]
+
+    row = f"{'total':<32}{totals['json'] * 1e6:>10.1f}"
+    row += ''.join(f"{totals[name] * 1e6:>13.1f}" for name in decoders)
+    print(row)
+
+    for decoder_name, decoder in decoders.items():
+        failures += contract_errors(decoder_name, decoder)
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
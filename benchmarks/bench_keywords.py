@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: keyword detection cost as the keyword dictionaries grow
+
+Compares the old substring loop over CATEGORY_KEYWORDS with a
+KeywordAutomaton holding the same keywords, for growing dictionary sizes.
+
+Usage:
+    python -m benchmarks.bench_keywords [--repeat N]
+"""
+
+import argparse
+import random
+import string
+import timeit
+from typing import Dict, List, Optional
+
+from api.utils.keyword_matcher import KeywordAutomaton
+from api.utils.tag_generator import CATEGORY_KEYWORDS, TOKEN_PATTERN
+
+
+def substring_detect(text: str, categories: Dict[str, List[str]]) -> Optional[str]:
+    """The old _detect_category: nested loop of `in` checks"""
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            if keyword in text:
+                return category
+    return None
+
+
+def automaton_detect(text: str, automaton: KeywordAutomaton, names: List[str]) -> Optional[str]:
+    """Distinct-token lookups against the automaton"""
+    best = None
+    for token in set(TOKEN_PATTERN.findall(text)):
+        for index in automaton.word_values.get(token, ()):
+            if best is None or index < best:
+                best = index
+    return names[best] if best is not None else None
+
+
+def grow_categories(rng: random.Random, size: int) -> Dict[str, List[str]]:
+    """CATEGORY_KEYWORDS padded with random keywords up to ~size entries"""
+    categories = {name: list(words) for name, words in CATEGORY_KEYWORDS.items()}
+    names = list(categories)
+    total = sum(len(words) for words in categories.values())
+    while total < size:
+        word = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randrange(6, 12)))
+        # Pad at the front so the substring loop can't exit early on real keywords
+        categories[rng.choice(names)].insert(0, word)
+        total += 1
+    return categories
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Keyword detection scaling benchmark')
+    parser.add_argument('--repeat', type=int, default=200, help='iterations per size')
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    text = ' '.join(
+        rng.choice(['serverless', 'telegram', 'python', 'deploy', 'latency', 'cache', 'metadata'])
+        for _ in range(300)
+    ) + ' cricket'
+
+    print(f"{'keywords':>10}{'substring us':>15}{'automaton us':>15}{'speedup':>10}")
+    for size in (50, 500, 5000, 20000):
+        categories = grow_categories(rng, size)
+        names = list(categories)
+        automaton = KeywordAutomaton.from_items(
+            (keyword, index)
+            for index, keywords in enumerate(categories.values())
+            for keyword in keywords
+        )
+
+        assert substring_detect(text, categories) == automaton_detect(text, automaton, names)
+
+        old = timeit.timeit(lambda: substring_detect(text, categories), number=args.repeat) / args.repeat
+        new = timeit.timeit(lambda: automaton_detect(text, automaton, names), number=args.repeat) / args.repeat
+        print(f"{size:>10}{old * 1e6:>15.1f}{new * 1e6:>15.1f}{old / new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark: single-pass head extraction vs the old per-field soup.find calls
+
+Usage:
+    python -m benchmarks.bench_meta_extract [--repeat N]
+"""
+
+import argparse
+import timeit
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from api.utils.head_parser import HeadParser
+from api.utils.meta_extractor import collect_head_candidates, pick_description, pick_title
+
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'html'
+CHUNK_SIZE = 16384
+
+
+# Baseline: the extractors fetch_metadata used before the single-pass engine
+
+def _extract_title(soup: BeautifulSoup) -> Optional[str]:
+    og_title = soup.find('meta', property='og:title')
+    if og_title and og_title.get('content'):
+        return og_title['content'].strip()
+    twitter_title = soup.find('meta', attrs={'name': 'twitter:title'})
+    if twitter_title and twitter_title.get('content'):
+        return twitter_title['content'].strip()
+    meta_title = soup.find('meta', attrs={'name': 'title'})
+    if meta_title and meta_title.get('content'):
+        return meta_title['content'].strip()
+    title_tag = soup.find('title')
+    if title_tag and title_tag.string:
+        return title_tag.string.strip()
+    return None
+
+
+def _extract_description(soup: BeautifulSoup) -> Optional[str]:
+    og_desc = soup.find('meta', property='og:description')
+    if og_desc and og_desc.get('content'):
+        return og_desc['content'].strip()
+    twitter_desc = soup.find('meta', attrs={'name': 'twitter:description'})
+    if twitter_desc and twitter_desc.get('content'):
+        return twitter_desc['content'].strip()
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc and meta_desc.get('content'):
+        return meta_desc['content'].strip()
+    return None
+
+
+def baseline(html: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Whole-document soup + seven find() walks"""
+    soup = BeautifulSoup(html, 'lxml')
+    return _extract_title(soup), _extract_description(soup)
+
+
+def single_pass(html: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Incremental parse up to </head> + one walk over head elements"""
+    parser = HeadParser()
+    for start in range(0, len(html), CHUNK_SIZE):
+        if parser.feed(html[start:start + CHUNK_SIZE]):
+            break
+    candidates = collect_head_candidates(parser.close())
+    return pick_title(candidates), pick_description(candidates)
+
+
+def load_corpus() -> Dict[str, bytes]:
+    return {path.name: path.read_bytes() for path in sorted(FIXTURES.glob('*.html'))}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--repeat', type=int, default=20, help='iterations per page')
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus()
+    total_old = total_new = 0.0
+
+    print(f"{'page':<20}{'bytes':>10}{'soup ms':>12}{'single ms':>12}{'speedup':>10}  match")
+    for name, html in corpus.items():
+        old = timeit.timeit(lambda: baseline(html), number=args.repeat) / args.repeat
+        new = timeit.timeit(lambda: single_pass(html), number=args.repeat) / args.repeat
+        total_old += old
+        total_new += new
+
+        old_result, new_result = baseline(html), single_pass(html)
+        # JSON-LD is a new fallback, so only compare fields the baseline found
+        match = all(o is None or o == n for o, n in zip(old_result, new_result))
+
+        print(
+            f"{name:<20}{len(html):>10}{old * 1000:>12.3f}{new * 1000:>12.3f}"
+            f"{old / new:>9.1f}x  {'yes' if match else 'NO ' + repr((old_result, new_result))}"
+        )
+
+    print(f"{'total':<30}{total_old * 1000:>12.3f}{total_new * 1000:>12.3f}{total_old / total_new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
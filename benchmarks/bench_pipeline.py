@@ -0,0 +1,127 @@
+"""
+End-to-end throughput benchmark for the webhook pipeline
+
+Replays synthetic updates against the FastAPI app with a local stub Telegram
+API and stub web server, then reports latency percentiles, updates/sec and
+peak RSS.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--updates N] [--concurrency N]
+        [--page-latency S] [--telegram-latency S] [--distinct-urls N]
+        [--host-concurrency N] [--max-p95-ms MS] [--json PATH]
+
+Every stub page lives on 127.0.0.1, so HOST_MAX_CONCURRENCY would cap all
+page fetches at the per-host limit meant for one real site. The benchmark
+raises it (--host-concurrency) and reports the value used.
+
+Exits with status 1 if --max-p95-ms is given and exceeded.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from typing import Any, Dict, List
+
+from .load_generator import replay, synthetic_updates
+from .stub_server import StubServer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = StubServer(page_latency=args.page_latency, telegram_latency=args.telegram_latency)
+    await server.start()
+
+    # The app reads these at import time, so import after the stub is up
+    os.environ['TELEGRAM_API_BASE'] = server.base_url
+    # Measure the pipeline, not Telegram's flood limits (0 disables a bucket)
+    os.environ.setdefault('TELEGRAM_GLOBAL_RATE', '0')
+    os.environ.setdefault('TELEGRAM_CHAT_RATE', '0')
+    # All stub pages share one host; don't let the per-host cap throttle them
+    os.environ['HOST_MAX_CONCURRENCY'] = str(args.host_concurrency)
+    from api import config
+    from api.webhook import app
+    from api.utils.http_client import open_clients, close_clients
+
+    # The stub listens on loopback, which the SSRF guards reject
+    config.BLOCKED_IP_PATTERNS = []
+    config.ALLOW_PRIVATE_ADDRESSES = True
+
+    updates = synthetic_updates(
+        server.base_url,
+        sorted(server.pages),
+        args.updates,
+        args.distinct_urls
+    )
+
+    await open_clients()
+    try:
+        started = time.perf_counter()
+        latencies = await replay(app, updates, args.concurrency)
+        elapsed = time.perf_counter() - started
+    finally:
+        await close_clients()
+        await server.stop()
+
+    return {
+        'updates': len(latencies),
+        'concurrency': args.concurrency,
+        'host_max_concurrency': config.HOST_MAX_CONCURRENCY,
+        'elapsed_s': round(elapsed, 3),
+        'updates_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'upstream_requests': dict(server.counts),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Webhook pipeline benchmark')
+    parser.add_argument('--updates', type=int, default=500, help='number of updates to replay')
+    parser.add_argument('--concurrency', type=int, default=20, help='max in-flight webhook calls')
+    parser.add_argument('--page-latency', type=float, default=0.05, help='stub page latency (s)')
+    parser.add_argument('--telegram-latency', type=float, default=0.02, help='stub Bot API latency (s)')
+    parser.add_argument('--distinct-urls', type=int, default=100, help='distinct URLs per page')
+    parser.add_argument('--host-concurrency', type=int, default=1000,
+                        help='HOST_MAX_CONCURRENCY for the run (all stub pages share one host)')
+    parser.add_argument('--max-p95-ms', type=float, default=None, help='fail if p95 exceeds this')
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    for key, value in report.items():
+        print(f"{key:<22}{value}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.max_p95_ms is not None and report['p95_ms'] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['p95_ms']} ms > {args.max_p95_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Long-polling worker check against a local stub Bot API
+
+Queues a burst of updates from a few chats, runs the poller until every
+update has been confirmed, and checks that every update got its reply in
+per-chat order. The default burst is large relative to the per-chat rate
+limit, so sending a page takes longer than UPDATE_DEADLINE.
+
+Usage:
+    python -m benchmarks.bench_poller [--updates N] [--chats N]
+        [--chat-rate R] [--chat-burst N] [--update-deadline S]
+
+Exits with status 1 if a reply is missing or out of order.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .stub_server import StubServer
+
+
+class PollingStub(StubServer):
+    """StubServer that also answers getUpdates from a queue of updates"""
+
+    def __init__(self, updates: List[Dict[str, Any]], page_size: int = 100):
+        super().__init__()
+        self.updates = updates
+        self.page_size = page_size
+        self.confirmed = 0
+        self.sent: List[Dict[str, Any]] = []
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[str, str, bytes]:
+        if path.endswith('/getUpdates'):
+            offset = json.loads(body or b'{}').get('offset') or 0
+            self.confirmed = max(self.confirmed, offset)
+            page = [update for update in self.updates if update['update_id'] >= offset][:self.page_size]
+            if not page:
+                # Short long-poll so the check finishes quickly
+                await asyncio.sleep(0.05)
+            return '200 OK', 'application/json', json.dumps({'ok': True, 'result': page}).encode()
+        if path.endswith('/sendMessage'):
+            self.sent.append(json.loads(body))
+        return await super()._route(method, path, body)
+
+
+def burst(count: int, chats: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': 0,
+                'chat': {'id': 1000 + update_id % chats, 'type': 'private'},
+                'text': f"note {update_id} about python and docker",
+            },
+        }
+        for update_id in range(1, count + 1)
+    ]
+
+
+def sent_order(sent: List[Dict[str, Any]]) -> Dict[Any, List[int]]:
+    """Chat -> update numbers in the order their replies were sent"""
+    order: Dict[Any, List[int]] = {}
+    for message in sent:
+        number = int(message['text'].split('note ', 1)[1].split()[0])
+        order.setdefault(message['chat_id'], []).append(number)
+    return order
+
+
+async def run(args: argparse.Namespace) -> Optional[str]:
+    updates = burst(args.updates, args.chats)
+    server = PollingStub(updates)
+    await server.start()
+
+    # The app reads these at import time, so import after the stub is up
+    os.environ['TELEGRAM_API_BASE'] = server.base_url
+    os.environ['TELEGRAM_CHAT_RATE'] = str(args.chat_rate)
+    os.environ['TELEGRAM_CHAT_BURST'] = str(args.chat_burst)
+    os.environ['UPDATE_DEADLINE'] = str(args.update_deadline)
+    os.environ.setdefault('TELEGRAM_GLOBAL_RATE', '0')
+    from api.poller import Poller
+    from api.utils.http_client import open_clients, close_clients
+
+    await open_clients()
+    poller = Poller(concurrency=4, max_pending=1000, poll_timeout=1)
+    started = time.perf_counter()
+    task = asyncio.create_task(poller.run())
+    try:
+        limit = started + args.timeout
+        while server.confirmed <= args.updates and time.perf_counter() < limit:
+            await asyncio.sleep(0.05)
+        poller.stop()
+        await task
+        elapsed = time.perf_counter() - started
+    finally:
+        await close_clients()
+        await server.stop()
+
+    print(f"updates {args.updates} in {args.chats} chats, chat limit {args.chat_rate:g}/s "
+          f"(burst {args.chat_burst:g}), UPDATE_DEADLINE {args.update_deadline:g}s")
+    print(f"replies sent {len(server.sent)}/{args.updates} in {elapsed:.2f}s")
+
+    expected = sent_order(
+        {'chat_id': update['message']['chat']['id'], 'text': update['message']['text']} for update in updates
+    )
+    if len(server.sent) != args.updates:
+        return "replies were lost"
+    if sent_order(server.sent) != expected:
+        return "replies were sent out of order within a chat"
+    return None
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--updates', type=int, default=20)
+    arg_parser.add_argument('--chats', type=int, default=1)
+    arg_parser.add_argument('--chat-rate', type=float, default=5.0)
+    arg_parser.add_argument('--chat-burst', type=float, default=3)
+    arg_parser.add_argument('--update-deadline', type=float, default=2.0)
+    arg_parser.add_argument('--timeout', type=float, default=60.0, help='give up after this many seconds')
+    args = arg_parser.parse_args()
+
+    failure = asyncio.run(run(args))
+    if failure:
+        print(f"FAIL: {failure}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Burst check for the outbound rate limiter under short deadlines
+
+Fires a burst of sends at one chat, each allowed only a short wait, then
+checks that sends cut short (turned away up front, or cancelled while
+waiting) gave their tokens back, so the chat is usable again once the
+bucket has refilled.
+
+Usage:
+    python -m benchmarks.bench_rate_limiter [--sends N] [--chat-rate R]
+        [--chat-burst N] [--max-wait S] [--pause S]
+
+Exits with status 1 if a send after the pause still has to wait.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from api.rate_limiter import TelegramRateLimiter
+
+
+async def burst(limiter: TelegramRateLimiter, args: argparse.Namespace, cancel: bool) -> int:
+    """Send args.sends messages to chat 1; returns how many got through"""
+    async def send() -> bool:
+        if cancel:
+            # Old-style caller: no max_wait, the wait itself gets cancelled
+            try:
+                await asyncio.wait_for(limiter.acquire(1), args.max_wait)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        return await limiter.acquire(1, max_wait=args.max_wait) is not None
+
+    results = await asyncio.gather(*(send() for _ in range(args.sends)))
+    return sum(results)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    ok = True
+    for cancel in (False, True):
+        limiter = TelegramRateLimiter(0, 1, args.chat_rate, args.chat_burst)
+        sent = await burst(limiter, args, cancel)
+        await asyncio.sleep(args.pause)
+
+        started = time.monotonic()
+        await limiter.acquire(1)
+        waited = time.monotonic() - started
+
+        mode = 'cancelled waits' if cancel else 'max_wait'
+        print(f"{mode:<16} sent {sent}/{args.sends}, next send after {args.pause:g}s pause waited {waited:.3f}s")
+        ok = ok and waited < 0.05
+    return ok
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument('--sends', type=int, default=20)
+    arg_parser.add_argument('--chat-rate', type=float, default=1.0)
+    arg_parser.add_argument('--chat-burst', type=float, default=3)
+    arg_parser.add_argument('--max-wait', type=float, default=0.5)
+    arg_parser.add_argument('--pause', type=float, default=2.0)
+    args = arg_parser.parse_args()
+
+    if not asyncio.run(run(args)):
+        print("FAIL: sends that never happened still hold tokens")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
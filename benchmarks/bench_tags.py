@@ -0,0 +1,132 @@
+"""
+Micro-benchmark: tag scoring engine vs the previous per-field implementation
+
+Usage:
+    python -m benchmarks.bench_tags [--repeat N] [--rounds N]
+"""
+
+import argparse
+import random
+import re
+import timeit
+from typing import Dict, List, Optional, Set, Tuple
+
+from api.utils.tag_generator import (
+    CATEGORY_KEYWORDS,
+    PRIORITY_KEYWORDS,
+    STOP_WORDS,
+    _get_domain_tags,
+    _get_media_tag,
+    generate_tags,
+)
+
+
+# Baseline: generate_tags before the single-pass engine
+
+def _legacy_tokenize(text: str) -> List[str]:
+    if not text:
+        return []
+    words = re.findall(r'\b[a-zA-Z][a-zA-Z0-9]{2,}\b', text)
+    return [w for w in words if w.lower() not in STOP_WORDS]
+
+
+def _legacy_scored_keywords(title: str, description: str, caption: str) -> List[Tuple[str, float]]:
+    word_scores: Dict[str, float] = {}
+    for word in _legacy_tokenize(title):
+        word_scores[word] = word_scores.get(word, 0) + 3.0
+    for word in _legacy_tokenize(description):
+        word_scores[word] = word_scores.get(word, 0) + 1.5
+    for word in _legacy_tokenize(caption):
+        word_scores[word] = word_scores.get(word, 0) + 1.0
+    for word in word_scores:
+        if word.lower().replace(' ', '') in PRIORITY_KEYWORDS:
+            word_scores[word] *= 2.0
+    return sorted(word_scores.items(), key=lambda x: x[1], reverse=True)[:15]
+
+
+def _detect_category(text: str) -> Optional[str]:
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            if keyword in text:
+                return category
+    return None
+
+
+def _legacy_normalize_tag(tag: str) -> Optional[str]:
+    normalized = re.sub(r'[^a-zA-Z0-9]', '', tag)
+    if normalized and not normalized[0].isupper():
+        normalized = normalized.capitalize()
+    return normalized if len(normalized) >= 3 else None
+
+
+def legacy_generate_tags(title='', description='', caption='', media_type=None, url=None) -> List[str]:
+    tags: Set[str] = set()
+    max_tags = 6
+    if url:
+        for tag in _get_domain_tags(url)[:3]:
+            tags.add(tag)
+    for keyword, score in _legacy_scored_keywords(title, description, caption):
+        if len(tags) >= max_tags:
+            break
+        normalized_keyword = keyword.lower().replace(' ', '')
+        if normalized_keyword in PRIORITY_KEYWORDS:
+            tags.add(PRIORITY_KEYWORDS[normalized_keyword])
+        else:
+            tag = _legacy_normalize_tag(keyword)
+            if tag and len(tag) >= 3:
+                tags.add(tag)
+    if len(tags) < max_tags:
+        category = _detect_category(f"{title} {description} {caption}".lower())
+        if category:
+            tags.add(category.capitalize())
+    if media_type and len(tags) < max_tags:
+        media_tag = _get_media_tag(media_type)
+        if media_tag:
+            tags.add(media_tag)
+    return [f"#{tag}" for tag in list(tags)[:max_tags]] or ['#Content']
+
+
+VOCABULARY = (
+    "python rust docker kubernetes tutorial guide serverless telegram bot api "
+    "metadata deploy vercel async performance latency cache database redis "
+    "frontend backend release notes community project roadmap feature design "
+    "Python Docker Kubernetes Serverless Telegram"
+).split()
+
+
+def make_case(rng: random.Random, title_words: int, body_words: int) -> Dict[str, str]:
+    def words(n: int) -> str:
+        return ' '.join(rng.choice(VOCABULARY + list(STOP_WORDS)[:40]) for _ in range(n))
+    return {
+        'title': words(title_words),
+        'description': words(body_words),
+        'caption': words(body_words),
+        'url': 'https://github.com/example/project',
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Tag generation benchmark')
+    parser.add_argument('--repeat', type=int, default=200, help='iterations per case')
+    parser.add_argument('--rounds', type=int, default=5, help='timing rounds per case; the best one is reported')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    cases = {
+        'short': make_case(rng, 8, 20),
+        'medium': make_case(rng, 12, 200),
+        'long caption': make_case(rng, 15, 1000),
+        'very long': make_case(rng, 20, 4000),
+    }
+
+    print(f"{'case':<16}{'legacy us':>12}{'engine us':>12}{'speedup':>10}")
+    for name, case in cases.items():
+        # Best round, so a noisy machine doesn't decide the comparison
+        old = min(timeit.repeat(lambda: legacy_generate_tags(**case), number=args.repeat, repeat=args.rounds))
+        new = min(timeit.repeat(lambda: generate_tags(**case), number=args.repeat, repeat=args.rounds))
+        old, new = old / args.repeat, new / args.repeat
+        print(f"{name:<16}{old * 1e6:>12.1f}{new * 1e6:>12.1f}{old / new:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Synthetic update generator and replayer
+Builds Telegram update JSON and POSTs it to the FastAPI app in-process
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+
+CAPTIONS = [
+    "Worth a read",
+    "Great python tutorial on async programming and docker deployment",
+    "check this out",
+    "",
+]
+
+TEXTS = [
+    "Notes from today's standup: migrate the API to FastAPI and add redis caching",
+    "Reminder: kubernetes workshop next week, bring a laptop",
+    "Learning rust and golang side by side, the borrow checker is humbling",
+]
+
+
+def synthetic_updates(
+    page_base_url: str,
+    pages: Sequence[str],
+    count: int,
+    distinct_urls: int,
+    seed: int = 42
+) -> List[Dict[str, Any]]:
+    """
+    Build a mix of link, plain text and media updates
+
+    Roughly 70% carry a link to one of the stub pages, 20% are plain
+    text and 10% are captionless photos.
+
+    Args:
+        page_base_url: Base URL of the stub web server
+        pages: Fixture page names to link to
+        count: Number of updates
+        distinct_urls: Number of distinct link URLs (controls cache hit rate)
+        seed: Random seed
+
+    Returns:
+        List of update dicts
+    """
+    rng = random.Random(seed)
+    updates = []
+
+    for update_id in range(1, count + 1):
+        chat = {'id': 1000 + rng.randrange(50), 'type': 'private'}
+        message: Dict[str, Any] = {'message_id': update_id, 'date': 0, 'chat': chat}
+        kind = rng.random()
+
+        if kind < 0.7:
+            page = rng.choice(pages)
+            variant = rng.randrange(max(distinct_urls, 1))
+            url = f"{page_base_url}/pages/{page}?v={variant}&utm_source=bench"
+            caption = rng.choice(CAPTIONS)
+            message['text'] = f"{caption} {url}".strip()
+        elif kind < 0.9:
+            message['text'] = rng.choice(TEXTS)
+        else:
+            message['photo'] = [
+                {'file_id': f"p{update_id}-{size}", 'width': size, 'height': size}
+                for size in (90, 320, 800)
+            ]
+
+        updates.append({'update_id': update_id, 'message': message})
+
+    return updates
+
+
+async def replay(app: Any, updates: List[Dict[str, Any]], concurrency: int) -> List[float]:
+    """
+    POST updates to the app with bounded concurrency
+
+    Args:
+        app: ASGI app
+        updates: Updates to send
+        concurrency: Max in-flight webhook calls
+
+    Returns:
+        Per-update latencies in seconds
+    """
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def send(update: Dict[str, Any]) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post('/', json=update)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(send(update) for update in updates))
+
+    return latencies
@@ -0,0 +1,119 @@
+"""
+Local stub upstreams for benchmarks
+One asyncio HTTP/1.1 server that plays both the Telegram Bot API and a web
+server serving recorded HTML fixtures, with configurable latency
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'html'
+
+
+class StubServer:
+    """
+    Minimal keep-alive HTTP server
+
+    Routes:
+        POST /bot<token>/<method>  -> {"ok": true, "result": {...}}
+        GET  /pages/<fixture>      -> recorded HTML (query string ignored)
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        page_latency: float = 0.0,
+        telegram_latency: float = 0.0
+    ):
+        self.host = host
+        self.port = port
+        self.page_latency = page_latency
+        self.telegram_latency = telegram_latency
+        self.pages: Dict[str, bytes] = {
+            path.name: path.read_bytes() for path in FIXTURES.glob('*.html')
+        }
+        self.counts = {'telegram': 0, 'pages': 0, 'not_found': 0}
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Drop idle keep-alive connections so their handlers finish
+            connections = dict(self._connections)
+            for writer in connections:
+                writer.close()
+            await asyncio.gather(*connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, body = request
+                status, content_type, payload = await self._route(method, path, body)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+
+        lines = head.decode('latin-1').split('\r\n')
+        method, path, _ = lines[0].split(' ', 2)
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip())
+        body = await reader.readexactly(length) if length else b''
+        return method, path, body
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[str, str, bytes]:
+        path = path.split('?', 1)[0]
+
+        if path.startswith('/bot'):
+            if self.telegram_latency:
+                await asyncio.sleep(self.telegram_latency)
+            self.counts['telegram'] += 1
+            request = json.loads(body or b'{}')
+            result = {'message_id': self.counts['telegram'], 'chat': {'id': request.get('chat_id')}}
+            return '200 OK', 'application/json', json.dumps({'ok': True, 'result': result}).encode()
+
+        if path.startswith('/pages/'):
+            page = self.pages.get(path[len('/pages/'):])
+            if page is not None:
+                if self.page_latency:
+                    await asyncio.sleep(self.page_latency)
+                self.counts['pages'] += 1
+                return '200 OK', 'text/html; charset=utf-8', page
+
+        self.counts['not_found'] += 1
+        return '404 Not Found', 'text/plain', b'not found'
@@ -0,0 +1,64 @@
+"""
+Build the IDF vocabulary used for tag scoring
+Run offline on a corpus of past titles/descriptions, then point
+TAG_IDF_PATH at the output file
+
+Corpus formats (by extension):
+    .jsonl  one JSON object per line; 'title' and 'description' are joined
+    other   one document per line
+
+Usage:
+    python scripts/build_idf.py corpus.jsonl -o idf.bin [--min-df 2] [--max-terms 50000]
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Iterator
+
+# Allow running from the repository root without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault("BOT_TOKEN", "0:build-idf")
+
+from api.utils.idf import count_document_frequencies, write_idf  # noqa: E402
+from api.utils.tag_generator import tokenize_terms  # noqa: E402
+
+
+def read_documents(path: str) -> Iterator[str]:
+    """Yield document texts from a corpus file"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith('.jsonl'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                yield f"{record.get('title', '')} {record.get('description', '')}"
+            else:
+                yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the tag IDF vocabulary")
+    parser.add_argument("corpus", help="corpus file (.jsonl or one document per line)")
+    parser.add_argument("-o", "--output", default="idf.bin", help="output vocabulary file")
+    parser.add_argument("--min-df", type=int, default=2, help="drop terms seen in fewer documents")
+    parser.add_argument("--max-terms", type=int, default=None, help="keep only the most frequent terms")
+    args = parser.parse_args()
+
+    doc_count, df = count_document_frequencies(read_documents(args.corpus), tokenize_terms)
+    if not doc_count:
+        print("❌ Corpus is empty")
+        sys.exit(1)
+
+    written = write_idf(args.output, doc_count, df, args.min_df, args.max_terms)
+    size = os.path.getsize(args.output)
+    print(f"✅ {written} terms from {doc_count} documents → {args.output} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()